@@ -0,0 +1,157 @@
+"""
+Packed vs single node-detail generation.
+
+Generates details for K sibling nodes twice against a simulated Groq
+client: once through generate_node_details_batch (up to
+NODE_DETAIL_BATCH_SIZE titles per completion) and once as K separate
+generate_node_detail calls, sequential and concurrent. The fake client
+charges prompt tokens by prompt length, completion tokens by the JSON it
+returns, and sleeps for a time-to-first-token plus a per-token decode time,
+so the totals come from the same usage rows the ledger would store.
+
+    cd backend && python -m benchmarks.batch_details
+    cd backend && python -m benchmarks.batch_details --nodes 5 20 --drop-rate 0.1
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import tempfile
+import time
+from types import SimpleNamespace
+
+# The app builds its engine and Groq client at import time; keep both local
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="batch-bench-"), "bench.db"))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ["NODE_CACHE_COLD_PATH"] = ""
+
+from src import ai_generator, usage  # noqa: E402
+
+SECTIONS = ["definition", "why_important", "examples", "interview_questions"]
+WORDS = (
+    "state hook render component effect memo closure scope async await promise "
+    "index query cache tree graph node edge hash map list array queue stack heap"
+).split()
+
+
+def _tokens(text: str) -> int:
+    # Roughly four characters per token for English prose and JSON
+    return math.ceil(len(text) / 4)
+
+
+def _detail(rng: random.Random, title: str) -> dict:
+    def sentence(n):
+        return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+    return {
+        "title": title,
+        "definition": " ".join(sentence(14) for _ in range(3)),
+        "why_important": " ".join(sentence(14) for _ in range(2)),
+        "examples": [sentence(10) for _ in range(2)],
+        "interview_questions": [{"q": sentence(8), "a": sentence(16)} for _ in range(2)],
+    }
+
+
+class SimulatedCompletions:
+    """
+    Answers node-detail prompts (single or batched) with synthetic JSON.
+    """
+
+    def __init__(self, seed: int, ttft: float, per_token: float, drop_rate: float):
+        self.rng = random.Random(seed)
+        self.ttft = ttft
+        self.per_token = per_token
+        self.drop_rate = drop_rate
+
+    async def create(self, **kwargs):
+        prompt = "\n".join(message["content"] for message in kwargs["messages"])
+        user = kwargs["messages"][-1]["content"]
+        if user.startswith("Node titles:"):
+            titles = [line[2:] for line in user.split("\n")[1:]]
+            # Occasionally return an entry without its definition to exercise the re-issue path
+            entries = [
+                {**self._sections(title), "definition": ""} if self.rng.random() < self.drop_rate else self._sections(title)
+                for title in titles
+            ]
+            content = json.dumps({"nodes": entries})
+        else:
+            title = re.search(r"node: (.*) under topic:", user).group(1)
+            content = json.dumps(self._sections(title))
+
+        completion_tokens = min(_tokens(content), kwargs["max_tokens"])
+        await asyncio.sleep(self.ttft + completion_tokens * self.per_token)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=_tokens(prompt), completion_tokens=completion_tokens),
+        )
+
+    def _sections(self, title: str) -> dict:
+        detail = _detail(self.rng, title)
+        return {"title": title, **{section: detail[section] for section in SECTIONS}}
+
+
+async def _packed(topic, titles):
+    return len(await ai_generator.generate_node_details_batch(topic, titles, SECTIONS))
+
+
+async def _single_sequential(topic, titles):
+    for title in titles:
+        await ai_generator.generate_node_detail(topic, title, None, SECTIONS)
+    return len(titles)
+
+
+async def _single_concurrent(topic, titles):
+    await asyncio.gather(*(ai_generator.generate_node_detail(topic, title, None, SECTIONS) for title in titles))
+    return len(titles)
+
+
+def run(strategy, k: int, args) -> dict:
+    rows = []
+    usage.usage_ledger.record = rows.append
+    ai_generator.client = SimpleNamespace(chat=SimpleNamespace(
+        completions=SimpleNamespace(create=SimulatedCompletions(args.seed, args.ttft_ms / 1000, args.ms_per_token / 1000, args.drop_rate).create)
+    ))
+    titles = [f"Subtopic {i}" for i in range(1, k + 1)]
+
+    started = time.perf_counter()
+    generated = asyncio.run(strategy("Benchmark Topic", titles))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "calls": len(rows),
+        "prompt": sum(row["prompt_tokens"] for row in rows),
+        "completion": sum(row["completion_tokens"] for row in rows),
+        "generated": generated,
+        "wall_s": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1, 3, 5, 10, 20], help="sibling counts K")
+    parser.add_argument("--batch-size", type=int, default=ai_generator.NODE_DETAIL_BATCH_SIZE)
+    parser.add_argument("--ttft-ms", type=float, default=250, help="simulated time to first token")
+    parser.add_argument("--ms-per-token", type=float, default=2, help="simulated decode time per completion token")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="share of batched entries returned invalid")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    ai_generator.NODE_DETAIL_BATCH_SIZE = args.batch_size
+    strategies = [("packed", _packed), ("single seq", _single_sequential), ("single conc", _single_concurrent)]
+
+    print(f"batch size {args.batch_size}, ttft {args.ttft_ms:g} ms, {args.ms_per_token:g} ms/token, drop rate {args.drop_rate:g}\n")
+    print(f"{'K':>3} {'strategy':>11} {'calls':>6} {'prompt':>8} {'complete':>9} {'total':>8} {'nodes':>6} {'wall s':>7}")
+    for k in args.nodes:
+        for name, strategy in strategies:
+            r = run(strategy, k, args)
+            print(
+                f"{k:>3} {name:>11} {r['calls']:>6} {r['prompt']:>8} {r['completion']:>9} "
+                f"{r['prompt'] + r['completion']:>8} {r['generated']:>6} {r['wall_s']:>7.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
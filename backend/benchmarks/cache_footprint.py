@@ -0,0 +1,96 @@
+"""
+Node cache footprint vs hit rate.
+
+Replays a Zipf-skewed stream of node-detail lookups against TieredCache at
+several hot-tier budgets, with and without the compressed disk tier, and
+prints memory/disk footprint next to the hit rates. A miss "generates" the
+entry and puts it, the way the node-detail route does.
+
+    cd backend && python -m benchmarks.cache_footprint
+    cd backend && python -m benchmarks.cache_footprint --entries 20000 --requests 200000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from src.cache import ByteLRU, CompressedDiskStore, TieredCache, node_section_key
+
+WORDS = (
+    "state hook render component effect memo closure scope async await promise "
+    "index query cache tree graph node edge hash map list array queue stack heap "
+    "thread lock latency throughput complexity interview example explain why use"
+).split()
+
+
+def _node_detail(rng: random.Random, i: int) -> dict:
+    def sentence(n):
+        return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+    return {
+        "title": f"Node {i}",
+        "definition": " ".join(sentence(14) for _ in range(4)),
+        "why_important": " ".join(sentence(14) for _ in range(3)),
+        "examples": [f"```python\n# {sentence(6)}\nvalue_{i} = compute({i})\n```" for _ in range(2)],
+        "interview_questions": [{"q": sentence(10), "a": " ".join(sentence(12) for _ in range(2))} for _ in range(3)],
+    }
+
+
+def _zipf_indices(rng: random.Random, entries: int, requests: int, skew: float):
+    weights = [1 / (rank ** skew) for rank in range(1, entries + 1)]
+    return rng.choices(range(entries), weights=weights, k=requests)
+
+
+def run(hot_bytes: int, cold: bool, values, stream, cold_max_bytes: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        store = CompressedDiskStore(os.path.join(directory, "cold.sqlite3"), cold_max_bytes) if cold else None
+        tiered = TieredCache(ByteLRU(hot_bytes), store)
+
+        started = time.perf_counter()
+        for i in stream:
+            key = node_section_key("Benchmark", f"Node {i}", "all")
+            if tiered.get(key) is None:
+                tiered.put(key, values[i])
+        elapsed = time.perf_counter() - started
+
+        stats = tiered.stats()
+        return {
+            "hot_mib": stats["hot"]["bytes"] / 2**20,
+            "cold_mib": stats["cold"]["bytes"] / 2**20 if cold else 0.0,
+            "cold_entries": stats["cold"]["entries"] if cold else 0,
+            "hot_hit": stats["hot"]["hit_rate"],
+            "overall_hit": stats["hit_rate"],
+            "us_per_lookup": elapsed / len(stream) * 1e6,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=5000, help="distinct nodes")
+    parser.add_argument("--requests", type=int, default=50000, help="lookups replayed")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of node popularity")
+    parser.add_argument("--hot-mib", type=float, nargs="+", default=[0.25, 1, 4, 16])
+    parser.add_argument("--cold-mib", type=float, default=256)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    values = [_node_detail(rng, i) for i in range(args.entries)]
+    stream = _zipf_indices(rng, args.entries, args.requests, args.skew)
+    raw_total = sum(len(json.dumps(v)) for v in values) / 2**20
+    print(f"{args.entries} nodes (~{raw_total:.1f} MiB raw), {args.requests} lookups, zipf s={args.skew}\n")
+
+    print(f"{'hot budget':>10} {'cold':>5} {'hot MiB':>8} {'cold MiB':>9} {'cold n':>7} {'hot hit':>8} {'all hit':>8} {'us/op':>7}")
+    for hot_mib in args.hot_mib:
+        for cold in (False, True):
+            r = run(int(hot_mib * 2**20), cold, values, stream, int(args.cold_mib * 2**20))
+            print(
+                f"{hot_mib:>8.2f}Mi {'on' if cold else 'off':>5} {r['hot_mib']:>8.2f} {r['cold_mib']:>9.2f} "
+                f"{r['cold_entries']:>7} {r['hot_hit']:>8.1%} {r['overall_hit']:>8.1%} {r['us_per_lookup']:>7.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
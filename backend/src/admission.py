@@ -0,0 +1,113 @@
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+from dotenv import load_dotenv
+
+from .scheduler import FairScheduler, QueueDisplaced, BULK
+from .deadlines import Deadline
+
+load_dotenv()
+
+
+class AdmissionController:
+    """
+    Caps the number of in-flight LLM calls and keeps a bounded wait queue.
+
+    Requests that find the queue full, or that wait longer than the queue
+    timeout, are shed with a 503 and a Retry-After header. A full queue first
+    sheds the newest request of its heaviest user, so one user flooding the
+    queue cannot lock everyone else out. Which queued request gets the next
+    free slot is decided by the FairScheduler.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float, retry_after: int, weights=None):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+
+        self.scheduler = FairScheduler(max_in_flight, weights)
+        self.admitted_count = 0
+        self.shed_count = 0
+        self.timeout_count = 0
+        self.displaced_count = 0
+
+    def _shed(self, detail: str) -> HTTPException:
+        return HTTPException(
+            status_code=503,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    @property
+    def in_flight(self) -> int:
+        return self.scheduler.in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return self.scheduler.waiting()
+
+    @asynccontextmanager
+    async def admit(self, user_id: str, priority: str = BULK, deadline: Deadline = None):
+        # Claiming a slot or a queue position happens synchronously, so every
+        # request in a burst sees the ones before it
+        if not self.scheduler.try_acquire():
+            if self.queue_depth >= self.max_queue and not self.scheduler.displace(user_id):
+                self.shed_count += 1
+                raise self._shed("Server busy, please retry shortly")
+
+            timeout = self.queue_timeout
+            if deadline is not None:
+                timeout = min(timeout, deadline.remaining())
+
+            waiter = self.scheduler.enqueue(user_id, priority)
+            granted = False
+            try:
+                await asyncio.wait_for(waiter, timeout=timeout)
+                granted = True
+            except asyncio.TimeoutError:
+                self.shed_count += 1
+                self.timeout_count += 1
+                if deadline is not None and deadline.expired:
+                    raise HTTPException(status_code=504, detail="Request deadline expired while queued")
+                raise self._shed("Timed out waiting for a free generation slot")
+            except QueueDisplaced:
+                self.shed_count += 1
+                self.displaced_count += 1
+                raise self._shed("Server busy, please retry shortly")
+            finally:
+                if not granted:
+                    self.scheduler.withdraw(user_id, priority, waiter)
+
+        self.admitted_count += 1
+        try:
+            yield
+        finally:
+            self.scheduler.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "admitted": self.admitted_count,
+            "shed": self.shed_count,
+            "queue_timeouts": self.timeout_count,
+            "displaced": self.displaced_count,
+            "scheduler": self.scheduler.stats(),
+        }
+
+
+# --- Shared controller for all LLM-backed routes ---
+llm_admission = AdmissionController(
+    max_in_flight=int(os.getenv("LLM_MAX_IN_FLIGHT", "8")),
+    max_queue=int(os.getenv("LLM_MAX_QUEUE", "32")),
+    queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10")),
+    retry_after=int(os.getenv("LLM_RETRY_AFTER_SECONDS", "5")),
+    # e.g. LLM_USER_WEIGHTS='{"user_abc": 2}' gives that user two grants per round
+    weights=json.loads(os.getenv("LLM_USER_WEIGHTS", "{}")),
+)
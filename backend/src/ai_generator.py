@@ -2,7 +2,7 @@
 # import json
 
 # from openai import OpenAI
-# from typing import Dict, Any
+# from typing import Dict, Any, List
 # from dotenv import load_dotenv
 
 # load_dotenv()
@@ -74,15 +74,133 @@
 
 import os
 import json
-from groq import Groq
-from typing import Dict, Any
+from groq import AsyncGroq
+from typing import Dict, Any, List, Callable, TypeVar
 from dotenv import load_dotenv
 
+from .cache import node_cache, node_section_key, node_followup_key, normalize_text
+from .usage import LLMCall
+
 load_dotenv()
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+T = TypeVar("T")
+
+# Async client so a cancelled request also aborts its in-flight completion
+client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+
+# --- Generation profiles ---
+# Every task starts on the fast model. Structured tasks get one retry on the
+# escalation model when complete output fails validation (bad JSON, missing
+# fields); API errors are never escalated. Output cut off by max_tokens is a
+# budget problem, not a model problem: it is retried once on the same model
+# with TRUNCATION_RETRY_FACTOR times the cap, and fails if cut off again.
+# Output caps are max_tokens plus max_tokens_per_item for every requested
+# item (subtopic, node section).
+FAST_MODEL = os.getenv("LLM_FAST_MODEL", "llama-3.1-8b-instant")
+ESCALATION_MODEL = os.getenv("LLM_ESCALATION_MODEL", "llama-3.3-70b-versatile")
+
+TASK_PROFILES = {
+    "challenge": {"model": FAST_MODEL, "escalate_to": ESCALATION_MODEL, "max_tokens": 600, "temperature": 0.7},
+    "topic_nodes": {"model": FAST_MODEL, "escalate_to": ESCALATION_MODEL, "max_tokens": 100, "max_tokens_per_item": 40, "temperature": 0.6},
+    # Items are the requested sections
+    "node_detail": {"model": FAST_MODEL, "escalate_to": ESCALATION_MODEL, "max_tokens": 0, "max_tokens_per_item": 300, "temperature": 0.6},
+    # Items are nodes x sections. Incomplete entries are re-issued and then
+    # go through node_detail, so no escalation here
+    "node_detail_batch": {"model": FAST_MODEL, "escalate_to": None, "max_tokens": 0, "max_tokens_per_item": 250, "temperature": 0.6},
+    # The prompt asks for under 200 words; the cap leaves room for code blocks.
+    # Answers that still hit it are returned as-is (no larger-cap retry),
+    # marked as truncated and not cached
+    "node_followup": {"model": FAST_MODEL, "escalate_to": None, "max_tokens": 800, "temperature": 0.6, "partial_ok": True},
+}
+
+# A truncated structured output is retried once with this many times the cap
+TRUNCATION_RETRY_FACTOR = 2
+
+
+class TruncatedOutput(ValueError):
+    """
+    The completion stopped at its max_tokens cap; text is what came back.
+    """
+
+    def __init__(self, text: str):
+        super().__init__("Output was cut off at max_tokens")
+        self.text = text
 
-def generate_challenge_with_ai(difficulty: str) -> Dict[str, Any]:
+
+async def _complete(
+    task: str,
+    messages: List[Dict[str, str]],
+    parse: Callable[[str], T],
+    items: int = 1,
+    fallback_on_failure: bool = True
+) -> T:
+    """
+    Run one completion under the task's TASK_PROFILES entry and return
+    parse(<stripped message text>).
+
+    Complete output that parse rejects is repeated once on the profile's
+    escalation model, if it has one. Output cut off at max_tokens is
+    repeated once on the same model with a TRUNCATION_RETRY_FACTOR larger
+    cap (unless the profile is partial_ok), and never escalated. Any other
+    failure is raised, TruncatedOutput for a cut-off.
+
+    Only a final failure is recorded as a fallback, and only when the caller
+    answers it with placeholder content (fallback_on_failure); callers that
+    retry or simply leave the result out pass False.
+    """
+    profile = TASK_PROFILES[task]
+    max_tokens = profile["max_tokens"] + profile.get("max_tokens_per_item", 0) * items
+    model = profile["model"]
+    escalate_to = profile["escalate_to"] if profile["escalate_to"] != model else None
+    escalated = False
+    raised_cap = False
+
+    while True:
+        call = LLMCall(task, escalated=escalated)
+        try:
+            response = await call.create(
+                client,
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=profile["temperature"],
+            )
+        except Exception:
+            call.record(fallback=fallback_on_failure)
+            raise
+
+        try:
+            raw_content = response.choices[0].message.content
+            if raw_content is None:
+                raise ValueError("Groq returned no content.")
+            if call.truncated:
+                raise TruncatedOutput(raw_content.strip())
+            result = parse(raw_content.strip())
+        except TruncatedOutput:
+            if not raised_cap and not profile.get("partial_ok", False):
+                call.record()
+                raised_cap = True
+                max_tokens *= TRUNCATION_RETRY_FACTOR
+                print(f"Retrying truncated {task} with max_tokens={max_tokens}")
+                continue
+            # A cut-off answer the task can use as-is is real content, not a placeholder
+            call.record(fallback=fallback_on_failure and not profile.get("partial_ok", False))
+            raise
+        except Exception as e:
+            if escalate_to and not escalated:
+                call.record()
+                escalated = True
+                model = escalate_to
+                print(f"Escalating {task} to {model}:", e)
+                continue
+            call.record(fallback=fallback_on_failure)
+            raise
+
+        call.record()
+        return result
+
+
+async def generate_challenge_with_ai(difficulty: str) -> Dict[str, Any]:
     system_prompt = """
     You are an expert coding challenge creator.
     Generate a coding question with 4 multiple choice options.
@@ -104,37 +222,12 @@ def generate_challenge_with_ai(difficulty: str) -> Dict[str, Any]:
     Do NOT add extra text outside JSON.
     """
 
-    try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",   # FREE & FAST
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Generate a {difficulty} difficulty coding challenge in JSON."}
-            ],
-            temperature=0.7,
-        )
-
-        # raw_content = response.choices[0].message.content.strip()
-
-        # Remove backticks if model wraps JSON in ```json ```
-        # if raw_content.startswith("```"):
-        #     raw_content = raw_content.strip("`")
-        #     raw_content = raw_content.replace("json", "").strip()
-
-        raw_content = response.choices[0].message.content
-
-        # Safety check for Pylance + rare model output issues
-        if raw_content is None:
-            raise ValueError("Groq returned no content.")
-
-        raw_content = raw_content.strip()
-
+    def parse(raw_content: str) -> Dict[str, Any]:
         # Remove backticks if wrapped in ```json ... ```
         if raw_content.startswith("```"):
             raw_content = raw_content.strip("`")
             raw_content = raw_content.replace("json", "").strip()
 
-
         challenge_data = json.loads(raw_content)
 
         # Validate required fields
@@ -142,9 +235,14 @@ def generate_challenge_with_ai(difficulty: str) -> Dict[str, Any]:
         for field in required_fields:
             if field not in challenge_data:
                 raise ValueError(f"Missing required field: {field}")
-
         return challenge_data
 
+    try:
+        return await _complete("challenge", [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"Generate a {difficulty} difficulty coding challenge in JSON."}
+        ], parse)
+
     except Exception as e:
         print("Groq AI Error:", e)
 
@@ -162,9 +260,14 @@ def generate_challenge_with_ai(difficulty: str) -> Dict[str, Any]:
         }
 
 
-def generate_node_followup(topic: str, node_title: str, followup: str) -> str:
+async def generate_node_followup(topic: str, node_title: str, followup: str) -> Dict[str, Any]:
     """
     Return a natural-language follow-up answer (no JSON). Keep it concise; include code blocks when relevant.
+
+    Returns: {"answer": "...", "truncated": bool}. An answer cut off by the
+    output cap is still returned, flagged as truncated, but never cached.
+    When no answer could be generated a placeholder is returned with
+    "fallback": True.
     """
     system_prompt = f"""
     You are an expert teacher. Answer follow-up questions about "{node_title}" within topic "{topic}" in short paragraphs.
@@ -181,33 +284,52 @@ def generate_node_followup(topic: str, node_title: str, followup: str) -> str:
     - Prefer under 200 words.
     """
 
-    try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": followup},
-            ],
-            temperature=0.6,
-        )
+    def parse(raw_content: str) -> str:
+        if not raw_content:
+            raise ValueError("Groq returned an empty node follow-up.")
+        return raw_content
 
-        raw_content = response.choices[0].message.content
-        if raw_content is None:
-            raise ValueError("Groq returned no content for node follow-up.")
-        return raw_content.strip()
+    try:
+        answer = await _complete("node_followup", [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": followup},
+        ], parse)
+        node_cache.put(node_followup_key(topic, node_title, followup), answer)
+        return {"answer": answer, "truncated": False}
+    except TruncatedOutput as e:
+        print("Groq node follow-up truncated at", TASK_PROFILES["node_followup"]["max_tokens"], "tokens")
+        if e.text:
+            return {"answer": e.text, "truncated": True}
+        return _fallback_node_followup()
     except Exception as e:
         print("Groq node follow-up error:", e)
-        return "Sorry, I couldn’t generate that answer. Please try again."
+        return _fallback_node_followup()
 
-def generate_topic_nodes(topic: str, max_subtopics: int = 8) -> Dict[str, Any]:
-    """
-    Generate a topic tree (root + subtopics) for the given topic.
 
-    Returns a JSON-friendly dict with keys:
-    - root: topic string
-    - nodes: list of nodes where each node is {"id": str, "title": str}
-    Note: Only returns immediate subtopics, no nested children.
+def _fallback_node_followup() -> Dict[str, Any]:
+    return {"answer": "Sorry, I couldn’t generate that answer. Please try again.", "truncated": False, "fallback": True}
+
+
+# Existing titles beyond this many are still deduped server-side, just not listed in the prompt
+MAX_PROMPT_EXCLUSIONS = 100
+
+
+async def _request_topic_nodes(
+    topic: str,
+    max_subtopics: int,
+    ancestors: List[str] = None,
+    exclude_titles: List[str] = None,
+    fallback_on_failure: bool = True
+) -> Dict[str, Any]:
     """
+    One completion for a topic's immediate subtopics. Raises on any failure.
+    """
+    context_rules = ""
+    if ancestors:
+        context_rules += f"\n    - The topic sits in a larger tree under: {' > '.join(ancestors)}. Only return subtopics specific to \"{topic}\" in that context"
+    if exclude_titles:
+        context_rules += f"\n    - These nodes already exist in the tree, do NOT return them or close variants: {'; '.join(exclude_titles)}"
+
     system_prompt = f"""
     You are an expert knowledge-graph generator. Given a topic, produce a JSON object describing a root node and up to {max_subtopics} immediate subtopics.
 
@@ -226,25 +348,11 @@ def generate_topic_nodes(topic: str, max_subtopics: int = 8) -> Dict[str, Any]:
     - Each node should only have "id" and "title" fields
     - Do NOT include "children" field in any node
     - Return only the immediate subtopics of the root topic
-    - Return no more than {max_subtopics} subtopics; prefer exactly {max_subtopics} if relevant subtopics exist
+    - Return no more than {max_subtopics} subtopics; prefer exactly {max_subtopics} if relevant subtopics exist{context_rules}
     - Only return the JSON object and no additional explanation.
     """
 
-    try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Create a short topic tree for: {topic}."}
-            ],
-            temperature=0.6,
-        )
-
-        raw_content = response.choices[0].message.content
-        if raw_content is None:
-            raise ValueError("Groq returned no content for topic nodes.")
-
-        raw_content = raw_content.strip()
+    def parse(raw_content: str) -> Dict[str, Any]:
         if raw_content.startswith("```"):
             raw_content = raw_content.strip("`")
             raw_content = raw_content.replace("json", "").strip()
@@ -269,24 +377,123 @@ def generate_topic_nodes(topic: str, max_subtopics: int = 8) -> Dict[str, Any]:
             "nodes": cleaned_nodes
         }
 
+    return await _complete("topic_nodes", [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"Create a short topic tree for: {topic}."}
+    ], parse, items=max_subtopics, fallback_on_failure=fallback_on_failure)
+
+
+def _fallback_topic_nodes(topic: str, max_subtopics: int) -> Dict[str, Any]:
+    nodes = []
+    for i, name in enumerate(["Overview", "Fundamentals", "Advanced Topics", "Examples", "Best Practices"][:max_subtopics], start=1):
+        nodes.append({"id": str(i), "title": name})
+
+    return {"root": topic, "nodes": nodes, "fallback": True}
+
+
+async def generate_topic_nodes(topic: str, max_subtopics: int = 8) -> Dict[str, Any]:
+    """
+    Generate a topic tree (root + subtopics) for the given topic.
+
+    Returns a JSON-friendly dict with keys:
+    - root: topic string
+    - nodes: list of nodes where each node is {"id": str, "title": str}
+    - fallback: True only when generation failed and placeholder nodes were returned
+    Note: Only returns immediate subtopics, no nested children.
+    """
+    try:
+        return await _request_topic_nodes(topic, max_subtopics)
     except Exception as e:
         print("Groq topic nodes error:", e)
         # Fallback simple node list
-        nodes = []
-        for i, name in enumerate(["Overview", "Fundamentals", "Advanced Topics", "Examples", "Best Practices"][:max_subtopics], start=1):
-            nodes.append({"id": str(i), "title": name})
+        return _fallback_topic_nodes(topic, max_subtopics)
 
-        return {"root": topic, "nodes": nodes}
 
+async def expand_topic_node(
+    topic: str,
+    max_subtopics: int,
+    ancestors: List[str],
+    existing_titles: List[str]
+) -> Dict[str, Any]:
+    """
+    Expand a node that already lives inside a tree.
 
-def generate_node_detail(topic: str, node_title: str, followup: str = None) -> Dict[str, Any]:
+    Ancestors and existing node titles are excluded in the prompt, and the
+    result is deduped against them (and itself) by normalized title. If too
+    few novel subtopics survive, one follow-up call asks for the shortfall.
+    Placeholder nodes (flagged "fallback": True) are returned only when
+    nothing novel was generated.
     """
-    Generate a detailed explanation for a specific node within a topic tree.
+    seen = {normalize_text(title) for title in [topic, *ancestors, *existing_titles]}
+    excluded = list(dict.fromkeys([*ancestors, *existing_titles]))
+    novel = []
+
+    def keep_novel(nodes):
+        for node in nodes:
+            key = normalize_text(node["title"])
+            if key and key not in seen and len(novel) < max_subtopics:
+                seen.add(key)
+                novel.append(node["title"])
+
+    try:
+        data = await _request_topic_nodes(topic, max_subtopics, ancestors, excluded[-MAX_PROMPT_EXCLUSIONS:])
+        keep_novel(data["nodes"])
+
+        shortfall = max_subtopics - len(novel)
+        if shortfall > 0:
+            # A failed top-up just leaves the result short, nothing is made up
+            more = await _request_topic_nodes(
+                topic, shortfall, ancestors, (excluded + novel)[-MAX_PROMPT_EXCLUSIONS:], fallback_on_failure=False
+            )
+            keep_novel(more["nodes"])
+    except Exception as e:
+        print("Groq topic expansion error:", e)
+        if not novel:
+            fallback = _fallback_topic_nodes(topic, max_subtopics)
+            keep_novel(fallback["nodes"])
+            return {**fallback, "nodes": [{"id": str(i), "title": title} for i, title in enumerate(novel, start=1)]}
+
+    return {
+        "root": topic,
+        "nodes": [{"id": str(i), "title": title} for i, title in enumerate(novel, start=1)]
+    }
+
 
-    Returns: {"title": <node_title>, "definition": "...", "why_important": "...", "examples": "..."}
+# Each node detail section: (what to ask for, JSON shape of the field)
+NODE_DETAIL_SECTIONS = {
+    "definition": ("a concise definition", '"definition": "..."'),
+    "why_important": ("why it's important", '"why_important": "..."'),
+    "examples": ("a short example or two", '"examples": ["ex1", "ex2"]'),
+    "interview_questions": ("2-3 interview-style questions with answers", '"interview_questions": [{"q": "...", "a": "..."}]'),
+}
+
+
+def _fallback_node_detail(topic: str, node_title: str) -> Dict[str, Any]:
+    return {
+        "title": node_title,
+        "definition": f"{node_title} is an important concept within {topic}.",
+        "why_important": "It helps understand core ideas and practical use-cases.",
+        "examples": ["Example 1", "Example 2"],
+        "interview_questions": [{"q": "What is this?", "a": "Short answer."}],
+        "fallback": True
+    }
+
+
+async def _request_node_detail(
+    topic: str,
+    node_title: str,
+    followup: str,
+    sections: List[str],
+    fallback_on_failure: bool = True
+) -> Dict[str, Any]:
+    """
+    One completion for a single node's sections. Raises on any failure.
     """
+    wanted = ", ".join(NODE_DETAIL_SECTIONS[section][0] for section in sections)
+    fields = ",\n      ".join(NODE_DETAIL_SECTIONS[section][1] for section in sections)
+
     system_prompt = f"""
-    You are an expert teacher. Given a topic "{topic}" and a node title "{node_title}", return a JSON object with a concise definition, why it's important, a short example, and 2-3 interview-style questions with answers.
+    You are an expert teacher. Given a topic "{topic}" and a node title "{node_title}", return a JSON object with {wanted}.
 
     If your answer includes any code, wrap it in fenced code blocks with the correct language label, for example:
     ```javascript
@@ -300,50 +507,165 @@ def generate_node_detail(topic: str, node_title: str, followup: str = None) -> D
     STRICT JSON FORMAT:
     {{
       "title": "...",
-      "definition": "...",
-      "why_important": "...",
-      "examples": ["ex1", "ex2"],
-      "interview_questions": [
-        {{"q": "...", "a": "..."}},
-      ]
+      {fields}
     }}
 
     Only return the JSON object.
     """
 
+    def parse(raw_content: str) -> Dict[str, Any]:
+        if raw_content.startswith("```"):
+            raw_content = raw_content.strip("`")
+            raw_content = raw_content.replace("json", "").strip()
+
+        data = json.loads(raw_content)
+
+        missing = [section for section in sections if not data.get(section)]
+        if missing:
+            raise ValueError(f"Missing node detail sections: {missing}")
+        return data
+
+    # If there's a followup question from the user, include it in the user message
+    user_message = f"Provide detailed info for node: {node_title} under topic: {topic}."
+    if followup:
+        user_message += f"\n\nFollow-up question: {followup} \nAnswer and expand the previous information accordingly."
+
+    data = await _complete("node_detail", [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_message}
+    ], parse, items=len(sections), fallback_on_failure=fallback_on_failure)
+
+    detail = {"title": data.get("title") or node_title}
+    for section in sections:
+        detail[section] = data[section]
+        if not followup:
+            node_cache.put(node_section_key(topic, node_title, section), data[section])
+    return detail
+
+
+async def generate_node_detail(topic: str, node_title: str, followup: str = None, sections: List[str] = None) -> Dict[str, Any]:
+    """
+    Generate a detailed explanation for a specific node within a topic tree.
+
+    Only the requested sections (default: all of NODE_DETAIL_SECTIONS) are
+    asked for, and each successfully generated section is cached on its own.
+    If generation fails, placeholder sections are returned with "fallback": True.
+
+    Returns: {"title": <node_title>, "definition": "...", "why_important": "...", "examples": [...], "interview_questions": [...]}
+    """
+    sections = sections or list(NODE_DETAIL_SECTIONS)
     try:
-        # If there's a followup question from the user, include it in the user message
-        user_message = f"Provide detailed info for node: {node_title} under topic: {topic}."
-        if followup:
-            user_message += f"\n\nFollow-up question: {followup} \nAnswer and expand the previous information accordingly."
-
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ],
-            temperature=0.6,
-        )
+        return await _request_node_detail(topic, node_title, followup, sections)
+    except Exception as e:
+        print("Groq node detail error:", e)
+        fallback = _fallback_node_detail(topic, node_title)
+        return {"title": node_title, **{section: fallback[section] for section in sections}, "fallback": True}
+
+
+# How many sibling nodes are packed into one completion
+NODE_DETAIL_BATCH_SIZE = int(os.getenv("NODE_DETAIL_BATCH_SIZE", "5"))
 
-        raw_content = response.choices[0].message.content
-        if raw_content is None:
-            raise ValueError("Groq returned no content for node detail.")
 
-        raw_content = raw_content.strip()
+async def _generate_node_detail_chunk(topic: str, node_titles: List[str], sections: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    One completion for several sibling nodes. Returns only the entries that
+    came back complete, keyed by the requested title.
+    """
+    wanted = ", ".join(NODE_DETAIL_SECTIONS[section][0] for section in sections)
+    fields = ", ".join(NODE_DETAIL_SECTIONS[section][1] for section in sections)
+    titles = "\n".join(f"- {title}" for title in node_titles)
+
+    system_prompt = f"""
+    You are an expert teacher. For each node title listed by the user, all within the topic "{topic}", write {wanted}.
+
+    If your answer includes any code, wrap it in fenced code blocks with the correct language label.
+    Keep the JSON valid by escaping newlines as needed.
+
+    STRICT JSON FORMAT:
+    {{
+      "nodes": [
+        {{"title": "<exact node title>", {fields}}}
+      ]
+    }}
+
+    Return exactly one entry per node title, using the title exactly as given.
+    Only return the JSON object.
+    """
+
+    def parse(raw_content: str) -> List[Any]:
         if raw_content.startswith("```"):
             raw_content = raw_content.strip("`")
             raw_content = raw_content.replace("json", "").strip()
 
         data = json.loads(raw_content)
-        return data
+        entries = data.get("nodes", []) if isinstance(data, dict) else data
+        if not isinstance(entries, list):
+            raise ValueError("Batched node detail is not a list of nodes.")
+        return entries
 
+    try:
+        entries = await _complete("node_detail_batch", [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"Node titles:\n{titles}"}
+        ], parse, items=len(node_titles) * len(sections), fallback_on_failure=False)
     except Exception as e:
-        print("Groq node detail error:", e)
-        return {
-            "title": node_title,
-            "definition": f"{node_title} is an important concept within {topic}.",
-            "why_important": "It helps understand core ideas and practical use-cases.",
-            "examples": ["Example 1", "Example 2"],
-            "interview_questions": [{"q": "What is this?", "a": "Short answer."}]
-        }
+        print("Groq batched node detail error:", e)
+        return {}
+
+    # Validate every entry on its own; a bad sibling must not sink the rest
+    requested = {normalize_text(title): title for title in node_titles}
+    details = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        title = requested.get(normalize_text(entry.get("title", "")))
+        if title is None or title in details:
+            continue
+        if any(not entry.get(section) for section in sections):
+            continue
+
+        details[title] = {"title": title, **{section: entry[section] for section in sections}}
+        for section in sections:
+            node_cache.put(node_section_key(topic, title, section), entry[section])
+
+    return details
+
+
+async def generate_node_details_batch(topic: str, node_titles: List[str], sections: List[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Generate details for several sibling nodes, packing up to
+    NODE_DETAIL_BATCH_SIZE titles into each completion so they share one
+    system prompt. Entries that fail validation are re-issued once (only
+    those, in chunks of the same size), then tried one node at a time.
+
+    Completions run one after another: the caller holds a single admission
+    slot for the whole batch. Nodes that still fail are left out rather than
+    filled with placeholder text; they can be generated on demand later.
+
+    Returns: {<node_title>: {"title": ..., <section>: ...}}
+    """
+    sections = sections or list(NODE_DETAIL_SECTIONS)
+    titles = list(dict.fromkeys(node_titles))
+
+    def chunked(items: List[str]) -> List[List[str]]:
+        return [items[i:i + NODE_DETAIL_BATCH_SIZE] for i in range(0, len(items), NODE_DETAIL_BATCH_SIZE)]
+
+    details: Dict[str, Dict[str, Any]] = {}
+    for chunk in chunked(titles):
+        details.update(await _generate_node_detail_chunk(topic, chunk, sections))
+
+    failed = [title for title in titles if title not in details]
+    if len(failed) > 1:
+        for chunk in chunked(failed):
+            details.update(await _generate_node_detail_chunk(topic, chunk, sections))
+        failed = [title for title in titles if title not in details]
+
+    for title in failed:
+        try:
+            detail = await _request_node_detail(topic, title, None, sections, fallback_on_failure=False)
+        except Exception as e:
+            print("Groq node detail error:", e)
+            continue
+        details[title] = {**detail, "title": title}
+
+    return details
@@ -1,7 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .routes import challenge, webhooks
+from .routes import challenge, webhooks, metrics
 from .routes import topic_tree
+from .profiling import ProfilingMiddleware
+from .usage import usage_ledger
 
 app = FastAPI()
 
@@ -13,8 +15,17 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+# Opt-in per-request profiling (PROFILE_ADMIN_TOKEN / PROFILE_SAMPLE_RATE); a no-op otherwise
+app.add_middleware(ProfilingMiddleware)
+
 
 app.include_router(challenge.router, prefix="/api")
 app.include_router(webhooks.router, prefix="/webhooks")
+app.include_router(metrics.router, prefix="/api")
+
+
+@app.on_event("shutdown")
+def flush_usage_ledger():
+    usage_ledger.close()
 
 # app.include_router(topic_tree.router, prefix="/api")
@@ -0,0 +1,223 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def normalize_text(text: str) -> str:
+    """
+    Comparison key for titles and questions: case, punctuation and spacing
+    are ignored ("Hash Map", "hash-map" and "HashMap" collide) while letters
+    in any script are kept, and so are "+" and "#" so C, C++ and C# stay apart.
+    """
+    return re.sub(r"[^\w+#]|_", "", str(text).casefold())
+
+
+def node_section_key(topic: str, node_title: str, section: str) -> str:
+    return f"detail:{normalize_text(topic)}:{normalize_text(node_title)}:{section}"
+
+
+def node_followup_key(topic: str, node_title: str, followup: str) -> str:
+    return f"followup:{normalize_text(topic)}:{normalize_text(node_title)}:{normalize_text(followup)}"
+
+
+class ByteLRU:
+    """
+    In-memory LRU bounded by the total encoded size of its values.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._data: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        if key not in self._data:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return self._data[key][0]
+
+    def put(self, key: str, value: Any, size: int) -> List[Tuple[str, Any]]:
+        """
+        Insert a value and return the entries evicted to make room for it.
+        """
+        if key in self._data:
+            self.current_bytes -= self._data.pop(key)[1]
+        if size > self.max_bytes:
+            return [(key, value)]
+
+        self._data[key] = (value, size)
+        self.current_bytes += size
+
+        evicted = []
+        while self.current_bytes > self.max_bytes:
+            old_key, (old_value, old_size) = self._data.popitem(last=False)
+            self.current_bytes -= old_size
+            evicted.append((old_key, old_value))
+        return evicted
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": _rate(self.hits, self.misses),
+        }
+
+
+class CompressedDiskStore:
+    """
+    zlib-compressed entries in a local SQLite file, bounded by compressed
+    bytes and evicted least-recently-accessed first.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_accessed_at ON entries (accessed_at)")
+        self.current_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return zlib.decompress(row[0])
+
+    def put(self, key: str, raw: bytes):
+        compressed = zlib.compress(raw, COLD_COMPRESSION_LEVEL)
+        size = len(compressed)
+        if size > self.max_bytes:
+            return
+
+        previous = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        if previous is not None:
+            self.current_bytes -= previous[0]
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, compressed, size, time.time()),
+        )
+        self.current_bytes += size
+        self._evict()
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed_at LIMIT 32"
+            ).fetchall()
+            if not rows:
+                self.current_bytes = 0
+                return
+            for key, size in rows:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.current_bytes -= size
+                if self.current_bytes <= self.max_bytes:
+                    return
+
+    def stats(self) -> dict:
+        entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "entries": entries,
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": _rate(self.hits, self.misses),
+        }
+
+
+class TieredCache:
+    """
+    Hot in-memory tier backed by a compressed on-disk cold tier.
+
+    Entries evicted from the hot tier are demoted to the cold tier; a cold
+    hit is decompressed and promoted back into the hot tier. Values must be
+    JSON-serializable, their encoded size is what the hot budget counts.
+    """
+
+    def __init__(self, hot: ByteLRU, cold: Optional[CompressedDiskStore]):
+        self.hot = hot
+        self.cold = cold
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self.hot.get(key)
+            if value is not None or self.cold is None:
+                return value
+
+            raw = self.cold.get(key)
+            if raw is None:
+                return None
+            value = json.loads(raw)
+            self._demote(self.hot.put(key, value, len(raw)))
+            return value
+
+    def put(self, key: str, value: Any):
+        raw = json.dumps(value).encode("utf-8")
+        with self._lock:
+            self._demote(self.hot.put(key, value, len(raw)))
+
+    def _demote(self, evicted: List[Tuple[str, Any]]):
+        if self.cold is None:
+            return
+        for key, value in evicted:
+            self.cold.put(key, json.dumps(value).encode("utf-8"))
+
+    def stats(self) -> dict:
+        with self._lock:
+            hot = self.hot.stats()
+            cold = self.cold.stats() if self.cold is not None else None
+        hits = hot["hits"] + (cold["hits"] if cold else 0)
+        return {
+            "hot": hot,
+            "cold": cold,
+            "hit_rate": _rate(hits, cold["misses"] if cold else hot["misses"]),
+        }
+
+
+def _rate(hits: int, misses: int) -> float:
+    total = hits + misses
+    return round(hits / total, 4) if total else 0.0
+
+
+# --- Shared cache for node details and follow-up answers ---
+NODE_CACHE_HOT_MAX_BYTES = int(os.getenv("NODE_CACHE_HOT_MAX_BYTES", str(8 * 1024 * 1024)))
+NODE_CACHE_COLD_MAX_BYTES = int(os.getenv("NODE_CACHE_COLD_MAX_BYTES", str(256 * 1024 * 1024)))
+# Empty NODE_CACHE_COLD_PATH disables the disk tier
+NODE_CACHE_COLD_PATH = os.getenv("NODE_CACHE_COLD_PATH", "cache/node_cache.sqlite3")
+COLD_COMPRESSION_LEVEL = 6
+
+node_cache = TieredCache(
+    hot=ByteLRU(NODE_CACHE_HOT_MAX_BYTES),
+    cold=CompressedDiskStore(NODE_CACHE_COLD_PATH, NODE_CACHE_COLD_MAX_BYTES) if NODE_CACHE_COLD_PATH else None,
+)
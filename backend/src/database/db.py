@@ -1,8 +1,11 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import func, case, select
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Optional, List, Iterator, Any
+import json
 
-from .models import ChallengeQuota, Challenge
+from .models import ChallengeQuota, Challenge, LLMUsage, TopicContent
+from .search import index_content, searchable_text, search_topic_contents
 
 
 def get_challenge_quota(db: Session, user_id: str) -> Optional[ChallengeQuota]:
@@ -66,6 +69,15 @@ def reset_quota_if_needed(db: Session, quota: ChallengeQuota) -> ChallengeQuota:
     return quota
 
 
+def charge_quota(db: Session, quota: ChallengeQuota, units: int) -> ChallengeQuota:
+    """
+    Deducts quota units for a completed generation, never going below zero.
+    """
+    quota.quota_remaining = max(0, quota.quota_remaining - units)
+    db.commit()
+    return quota
+
+
 def create_challenge(
     db: Session,
     difficulty: str,
@@ -102,3 +114,134 @@ def get_user_challenges(db: Session, user_id: str) -> List[Challenge]:
         .filter(Challenge.created_by == user_id)
         .all()
     )
+
+
+def save_topic_content(
+    db: Session,
+    user_id: str,
+    kind: str,
+    topic: str,
+    content: Any,
+    node_title: Optional[str] = None
+) -> TopicContent:
+    """
+    Stores a piece of generated content (tree, node detail, follow-up) for a
+    user and adds it to the search index in the same transaction.
+    """
+    row = TopicContent(
+        user_id=user_id,
+        kind=kind,
+        topic=topic,
+        node_title=node_title,
+        content=json.dumps(content)
+    )
+    try:
+        db.add(row)
+        db.flush()
+        title, body = searchable_text(kind, topic, node_title, content)
+        index_content(db, row.id, user_id, title, body)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    db.refresh(row)
+    return row
+
+
+def iter_user_challenges(db: Session, user_id: str, batch_size: int = 1000) -> Iterator[dict]:
+    """
+    Streams a user's challenges as plain row mappings through a server-side
+    cursor, so memory stays constant regardless of row count.
+    """
+    table = Challenge.__table__
+    result = db.execute(
+        select(table)
+        .where(table.c.created_by == user_id)
+        .order_by(table.c.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for row in result.mappings():
+        yield row
+
+
+def iter_user_topic_contents(db: Session, user_id: str, batch_size: int = 1000) -> Iterator[dict]:
+    """
+    Streams a user's saved topic content, same cursor semantics as iter_user_challenges.
+    """
+    table = TopicContent.__table__
+    result = db.execute(
+        select(table)
+        .where(table.c.user_id == user_id)
+        .order_by(table.c.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for row in result.mappings():
+        yield row
+
+
+def search_user_content(db: Session, user_id: str, query: str, page: int = 1, page_size: int = 20) -> dict:
+    """
+    One page of ranked search results over a user's saved content.
+    """
+    offset = (page - 1) * page_size
+    # Fetch one extra row to know whether another page exists
+    rows = search_topic_contents(db, user_id, query, page_size + 1, offset)
+
+    results = []
+    for row in rows[:page_size]:
+        results.append({
+            "id": row["id"],
+            "kind": row["kind"],
+            "topic": row["topic"],
+            "node_title": row["node_title"],
+            "content": json.loads(row["content"]),
+            "created_at": row["created_at"],
+            "rank": float(row["rank"]),
+        })
+
+    return {"page": page, "page_size": page_size, "has_more": len(rows) > page_size, "results": results}
+
+
+def _usage_totals(db: Session, group_column, since: datetime, user_id: Optional[str] = None) -> List[dict]:
+    query = (
+        db.query(
+            group_column,
+            func.count(LLMUsage.id),
+            func.coalesce(func.sum(LLMUsage.prompt_tokens), 0),
+            func.coalesce(func.sum(LLMUsage.completion_tokens), 0),
+            func.avg(LLMUsage.latency_ms),
+            func.coalesce(func.sum(case((LLMUsage.fallback, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((LLMUsage.escalated, 1), else_=0)), 0),
+        )
+        .filter(LLMUsage.created_at >= since)
+    )
+    if user_id is not None:
+        query = query.filter(LLMUsage.user_id == user_id)
+
+    rows = query.group_by(group_column).order_by(func.sum(LLMUsage.completion_tokens).desc()).all()
+    return [
+        {
+            "key": key,
+            "calls": calls,
+            "prompt_tokens": int(prompt_tokens),
+            "completion_tokens": int(completion_tokens),
+            "avg_latency_ms": round(float(avg_latency or 0), 1),
+            "fallbacks": int(fallbacks),
+            "escalations": int(escalations),
+        }
+        for key, calls, prompt_tokens, completion_tokens, avg_latency, fallbacks, escalations in rows
+    ]
+
+
+def get_usage_by_user(db: Session, since: datetime) -> List[dict]:
+    """
+    Token, latency, fallback and escalation totals per user since the given time.
+    """
+    return _usage_totals(db, LLMUsage.user_id, since)
+
+
+def get_usage_by_endpoint(db: Session, since: datetime, user_id: Optional[str] = None) -> List[dict]:
+    """
+    Token, latency, fallback and escalation totals per endpoint, optionally for one user.
+    """
+    return _usage_totals(db, LLMUsage.endpoint, since, user_id)
@@ -117,8 +117,9 @@
 
 
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
-from sqlalchemy import String, Integer, DateTime, create_engine
+from sqlalchemy import String, Integer, DateTime, Boolean, Text, create_engine, inspect, text
 from datetime import datetime
+from typing import Optional
 import os
 from dotenv import load_dotenv
 
@@ -166,9 +167,44 @@ class ChallengeQuota(Base):
     last_reset_date: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
 
 
+# --- Generated Topic Content Model ---
+class TopicContent(Base):
+    __tablename__ = "topic_contents"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    kind: Mapped[str] = mapped_column(String, nullable=False)   # "tree", "node_detail" or "followup"
+    topic: Mapped[str] = mapped_column(String, nullable=False)
+    node_title: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    content: Mapped[str] = mapped_column(Text, nullable=False)  # JSON document
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+
+# --- LLM Usage Ledger Model ---
+class LLMUsage(Base):
+    __tablename__ = "llm_usage"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
+    endpoint: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
+    task: Mapped[str] = mapped_column(String, nullable=False)
+    model: Mapped[str] = mapped_column(String, nullable=False)
+    prompt_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    completion_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    latency_ms: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    fallback: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    escalated: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, index=True)
+
+
 # --- Create Tables ---
 Base.metadata.create_all(bind=engine)
 
+# create_all never alters existing tables; add columns introduced after a table first shipped
+with engine.begin() as conn:
+    if "escalated" not in {column["name"] for column in inspect(conn).get_columns("llm_usage")}:
+        conn.execute(text("ALTER TABLE llm_usage ADD COLUMN escalated BOOLEAN NOT NULL DEFAULT FALSE"))
+
 
 # --- Dependency for FastAPI ---
 def get_db():
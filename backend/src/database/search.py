@@ -0,0 +1,150 @@
+import re
+from typing import Any, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .models import engine
+
+# One row per topic_contents row: Postgres tsvector + GIN, SQLite FTS5 elsewhere
+SEARCH_TABLE = "topic_search"
+
+# Title matches outrank body matches
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+_POSTGRES_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} (
+        content_id INTEGER PRIMARY KEY REFERENCES topic_contents(id) ON DELETE CASCADE,
+        user_id VARCHAR NOT NULL,
+        document TSVECTOR NOT NULL
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)",
+    f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_user_id ON {SEARCH_TABLE} (user_id)",
+]
+
+_SQLITE_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        title, body, user_id, content_id UNINDEXED, tokenize = 'porter unicode61'
+    )
+    """,
+]
+
+
+def _is_postgres(bind) -> bool:
+    return bind.dialect.name == "postgresql"
+
+
+def ensure_search_index(bind=engine):
+    """
+    Creates the search table/index for the current database if missing.
+    """
+    with bind.begin() as conn:
+        for statement in (_POSTGRES_DDL if _is_postgres(bind) else _SQLITE_DDL):
+            conn.execute(text(statement))
+
+
+def searchable_text(kind: str, topic: str, node_title: str, content: Any) -> Tuple[str, str]:
+    """
+    Splits a saved content document into (title, body) text for indexing.
+    """
+    title = node_title or topic
+    parts = []
+
+    if isinstance(content, dict):
+        if kind == "tree":
+            title = content.get("root") or title
+            parts.extend(node.get("title", "") for node in content.get("nodes", []) if isinstance(node, dict))
+        for field in ("definition", "why_important", "question", "answer"):
+            if content.get(field):
+                parts.append(str(content[field]))
+        for example in content.get("examples") or []:
+            parts.append(str(example))
+        for item in content.get("interview_questions") or []:
+            if isinstance(item, dict):
+                parts.append(f"{item.get('q', '')} {item.get('a', '')}")
+
+    if title != topic:
+        parts.insert(0, topic)
+    return title, "\n".join(parts)
+
+
+def index_content(db: Session, content_id: int, user_id: str, title: str, body: str):
+    """
+    Adds one content row to the search index. Runs inside the caller's
+    transaction, so the index is updated together with the content itself.
+    """
+    if _is_postgres(db.get_bind()):
+        db.execute(
+            text(
+                f"INSERT INTO {SEARCH_TABLE} (content_id, user_id, document) VALUES ("
+                ":content_id, :user_id, "
+                "setweight(to_tsvector('english', :title), 'A') || setweight(to_tsvector('english', :body), 'B'))"
+            ),
+            {"content_id": content_id, "user_id": user_id, "title": title, "body": body},
+        )
+    else:
+        db.execute(
+            text(f"INSERT INTO {SEARCH_TABLE} (title, body, user_id, content_id) VALUES (:title, :body, :user_id, :content_id)"),
+            {"content_id": content_id, "user_id": user_id, "title": title, "body": body},
+        )
+
+
+def _fts5_query(query: str) -> str:
+    # Quote every term so user input can't inject FTS5 syntax; last term matches as a prefix
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _fts5_user_filter(user_id: str) -> str:
+    # user_id is an indexed FTS column so the match only walks this user's postings
+    return 'user_id : "' + user_id.replace('"', '""') + '"'
+
+
+def search_topic_contents(db: Session, user_id: str, query: str, limit: int, offset: int) -> List[dict]:
+    """
+    Ranked full-text search over one user's saved content, best match first.
+    """
+    if _is_postgres(db.get_bind()):
+        statement = text(
+            f"""
+            SELECT c.id, c.kind, c.topic, c.node_title, c.content, c.created_at,
+                   ts_rank(s.document, q, 1) AS rank
+            FROM {SEARCH_TABLE} s
+            JOIN topic_contents c ON c.id = s.content_id,
+                 websearch_to_tsquery('english', :query) q
+            WHERE s.user_id = :user_id AND s.document @@ q
+            ORDER BY rank DESC, c.id DESC
+            LIMIT :limit OFFSET :offset
+            """
+        )
+        params = {"query": query}
+    else:
+        match = _fts5_query(query)
+        if not match:
+            return []
+        statement = text(
+            f"""
+            SELECT c.id, c.kind, c.topic, c.node_title, c.content, c.created_at,
+                   -bm25({SEARCH_TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT}, 0.0) AS rank
+            FROM {SEARCH_TABLE}
+            JOIN topic_contents c ON c.id = {SEARCH_TABLE}.content_id
+            WHERE {SEARCH_TABLE} MATCH :query AND {SEARCH_TABLE}.user_id = :user_id
+            ORDER BY rank DESC, c.id DESC
+            LIMIT :limit OFFSET :offset
+            """
+        )
+        params = {"query": f"{_fts5_user_filter(user_id)} AND {{title body}} : ({match})"}
+
+    params.update({"user_id": user_id, "limit": limit, "offset": offset})
+    return [dict(row) for row in db.execute(statement, params).mappings()]
+
+
+ensure_search_index()
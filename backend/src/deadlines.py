@@ -0,0 +1,137 @@
+import asyncio
+import os
+import time
+from typing import Coroutine, Dict, Optional, TypeVar
+
+from fastapi import HTTPException, Request
+from dotenv import load_dotenv
+
+load_dotenv()
+
+T = TypeVar("T")
+
+# --- Tunables ---
+MAX_TIMEOUT_SECONDS = float(os.getenv("LLM_MAX_TIMEOUT_SECONDS", "60"))
+DISCONNECT_POLL_SECONDS = float(os.getenv("LLM_DISCONNECT_POLL_SECONDS", "0.25"))
+CANCEL_GRACE_SECONDS = float(os.getenv("LLM_CANCEL_GRACE_SECONDS", "2"))
+NEARLY_COMPLETE_RATIO = float(os.getenv("LLM_NEARLY_COMPLETE_RATIO", "0.75"))
+
+# Clients can shorten (never extend past the max) the per-route default
+TIMEOUT_HEADER = "x-request-timeout"
+
+# Status nginx uses for "client closed request"; nobody reads the body anyway
+CLIENT_CLOSED_REQUEST = 499
+
+
+class Deadline:
+    """
+    Absolute point in time by which a request must have its answer.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+def request_deadline(request: Request, default_timeout: float) -> Deadline:
+    """
+    Build the deadline for a request from the timeout header or the route default.
+    """
+    timeout = default_timeout
+    header = request.headers.get(TIMEOUT_HEADER)
+    if header:
+        try:
+            timeout = float(header)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid {TIMEOUT_HEADER} header")
+        if timeout <= 0:
+            raise HTTPException(status_code=400, detail=f"Invalid {TIMEOUT_HEADER} header")
+
+    return Deadline(min(timeout, MAX_TIMEOUT_SECONDS))
+
+
+class CancellationTracker:
+    """
+    Runs generation coroutines until they finish, the deadline passes or the
+    client goes away, and keeps a running latency estimate per task so that
+    nearly finished work is allowed to complete (and land in the cache).
+    """
+
+    def __init__(self):
+        self._expected_latency: Dict[str, float] = {}
+        self.completed = 0
+        self.cancelled = 0
+        self.finished_after_cancel = 0
+        self.disconnects = 0
+        self.deadline_exceeded = 0
+
+    def _record_latency(self, name: str, elapsed: float):
+        previous = self._expected_latency.get(name)
+        self._expected_latency[name] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+
+    def _grace_for(self, name: str, elapsed: float) -> Optional[float]:
+        expected = self._expected_latency.get(name)
+        if expected is None or elapsed < NEARLY_COMPLETE_RATIO * expected:
+            return None
+        return min(CANCEL_GRACE_SECONDS, max(expected - elapsed, 0.0) + DISCONNECT_POLL_SECONDS)
+
+    async def _finish_or_cancel(self, task: asyncio.Task, name: str, started: float):
+        grace = self._grace_for(name, time.monotonic() - started)
+        if grace:
+            done, _ = await asyncio.wait({task}, timeout=grace)
+            if done:
+                self.finished_after_cancel += 1
+                return
+
+        self.cancelled += 1
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def run(self, request: Request, deadline: Deadline, coro: Coroutine[None, None, T], name: str) -> T:
+        # The request may have waited in the admission queue; don't start
+        # a Groq call for a client that already left
+        if await request.is_disconnected():
+            self.disconnects += 1
+            coro.close()
+            raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+
+        started = time.monotonic()
+        task = asyncio.ensure_future(coro)
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=min(DISCONNECT_POLL_SECONDS, deadline.remaining()))
+                if done:
+                    self.completed += 1
+                    self._record_latency(name, time.monotonic() - started)
+                    return task.result()
+
+                if deadline.expired:
+                    self.deadline_exceeded += 1
+                    raise HTTPException(status_code=504, detail="Generation deadline exceeded")
+
+                if await request.is_disconnected():
+                    self.disconnects += 1
+                    raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+        finally:
+            if not task.done():
+                await self._finish_or_cancel(task, name, started)
+
+    def stats(self) -> dict:
+        return {
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "finished_after_cancel": self.finished_after_cancel,
+            "disconnects": self.disconnects,
+            "deadline_exceeded": self.deadline_exceeded,
+            "expected_latency_seconds": {name: round(value, 3) for name, value in self._expected_latency.items()},
+        }
+
+
+llm_calls = CancellationTracker()
@@ -0,0 +1,86 @@
+import json
+import zlib
+from datetime import datetime
+from typing import Iterator
+
+from .database.models import SessionLocal
+from .database.db import iter_user_challenges, iter_user_topic_contents
+
+# Rows are joined into chunks of roughly this size before being sent
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _challenge_record(row) -> dict:
+    return {
+        "type": "challenge",
+        "id": row["id"],
+        "difficulty": row["difficulty"],
+        "title": row["title"],
+        "options": row["options"],
+        "correct_answer_id": row["correct_answer_id"],
+        "explanation": row["explanation"],
+        "created_at": row["date_created"],
+    }
+
+
+def _topic_content_record(row) -> dict:
+    return {
+        "type": "topic_content",
+        "id": row["id"],
+        "kind": row["kind"],
+        "topic": row["topic"],
+        "node_title": row["node_title"],
+        "content": json.loads(row["content"]),
+        "created_at": row["created_at"],
+    }
+
+
+def _ndjson_lines(user_id: str) -> Iterator[bytes]:
+    # The export outlives the request's get_db() session, so it owns its own
+    db = SessionLocal()
+    try:
+        for row in iter_user_challenges(db, user_id):
+            yield (json.dumps(_challenge_record(row), default=_json_default) + "\n").encode("utf-8")
+        for row in iter_user_topic_contents(db, user_id):
+            yield (json.dumps(_topic_content_record(row), default=_json_default) + "\n").encode("utf-8")
+    finally:
+        db.close()
+
+
+def export_user_history(user_id: str, compress: bool = False) -> Iterator[bytes]:
+    """
+    Yields a user's challenges and saved topic content as NDJSON, optionally
+    gzip-compressed, in bounded chunks. Rows are read through server-side
+    cursors and written as they arrive, so memory does not grow with history.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31 -> gzip container
+    buffer = []
+    buffered = 0
+
+    for line in _ndjson_lines(user_id):
+        buffer.append(line)
+        buffered += len(line)
+        if buffered < EXPORT_CHUNK_BYTES:
+            continue
+
+        chunk = b"".join(buffer)
+        buffer, buffered = [], 0
+        if compressor is None:
+            yield chunk
+        else:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+
+    chunk = b"".join(buffer)
+    if compressor is None:
+        if chunk:
+            yield chunk
+    else:
+        yield compressor.compress(chunk) + compressor.flush()
@@ -0,0 +1,209 @@
+import asyncio
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Settings ---
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "100"))
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.005"))
+BLOCKING_THRESHOLD_SECONDS = float(os.getenv("PROFILE_BLOCKING_THRESHOLD_SECONDS", "0.05"))
+
+# Send "X-Profile: <PROFILE_ADMIN_TOKEN>" to force a capture for one request
+PROFILE_HEADER = b"x-profile"
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples one thread's Python stack at a fixed interval and counts the
+    collapsed stacks, ready to be written in flamegraph "folded" format.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(labels))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class LoopBlockMonitor:
+    """
+    Heartbeat on the event loop; a heartbeat that wakes up late means
+    something held the loop, and that gap is recorded as a blocking span.
+    """
+
+    def __init__(self, started: float, threshold: float):
+        self.started = started
+        self.threshold = threshold
+        self.interval = threshold / 2
+        self.spans = []
+        self._last_beat = started
+        self._task = None
+
+    def _check(self):
+        now = time.perf_counter()
+        late_by = now - self._last_beat - self.interval
+        if late_by >= self.threshold:
+            self.spans.append({
+                "start_ms": round((self._last_beat + self.interval - self.started) * 1000, 2),
+                "duration_ms": round(late_by * 1000, 2),
+            })
+        self._last_beat = now
+
+    async def _beat(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self._check()
+
+    def start(self):
+        self._last_beat = time.perf_counter()
+        self._task = asyncio.ensure_future(self._beat())
+
+    async def stop(self):
+        self._check()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+def _prune(directory: Path, keep: int):
+    profiles = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+    for meta in profiles[:max(0, len(profiles) - keep)]:
+        meta.unlink(missing_ok=True)
+        meta.with_suffix(".folded").unlink(missing_ok=True)
+
+
+def _write_profile(name: str, folded: str, meta: dict):
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    (PROFILE_DIR / f"{name}.folded").write_text(folded)
+    (PROFILE_DIR / f"{name}.json").write_text(json.dumps(meta, indent=2))
+    _prune(PROFILE_DIR, PROFILE_MAX_FILES)
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in per-request profiling. A request is captured when it carries the
+    admin profiling header or is picked by PROFILE_SAMPLE_RATE; everything
+    else passes straight through.
+
+    Each capture writes <name>.folded (feed to flamegraph.pl / speedscope)
+    and <name>.json (wall time, status, event-loop blocking spans) to
+    PROFILE_DIR, keeping the newest PROFILE_MAX_FILES captures.
+
+    The sampler sees the whole event-loop thread, so other requests running
+    at the same time show up in the flamegraph too; the .json records how
+    many were in flight. Work pushed to the threadpool is not sampled.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.enabled = bool(PROFILE_ADMIN_TOKEN) or PROFILE_SAMPLE_RATE > 0
+        self.in_flight = 0
+        # Peak in-flight request count for each capture still running
+        self._capture_peaks = []
+
+    def _should_profile(self, scope) -> bool:
+        if PROFILE_ADMIN_TOKEN:
+            for key, value in scope["headers"]:
+                if key == PROFILE_HEADER:
+                    return hmac.compare_digest(value, PROFILE_ADMIN_TOKEN.encode())
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        for peak in self._capture_peaks:
+            peak[0] = max(peak[0], self.in_flight)
+        try:
+            if self._should_profile(scope):
+                await self._capture(scope, receive, send)
+            else:
+                await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    async def _capture(self, scope, receive, send):
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        path = re.sub(r"[^A-Za-z0-9]+", "-", scope["path"]).strip("-") or "root"
+        name = f"{stamp}_{scope['method']}_{path}"
+        status = {"code": None}
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", name.encode())]
+            await send(message)
+
+        concurrent_at_start = self.in_flight
+        peak = [self.in_flight]
+        self._capture_peaks.append(peak)
+
+        started = time.perf_counter()
+        sampler = StackSampler(threading.get_ident(), PROFILE_INTERVAL_SECONDS)
+        monitor = LoopBlockMonitor(started, BLOCKING_THRESHOLD_SECONDS)
+        sampler.start()
+        monitor.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            wall_ms = (time.perf_counter() - started) * 1000
+            await monitor.stop()
+            sampler.stop()
+            self._capture_peaks.remove(peak)
+
+            meta = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status["code"],
+                "wall_ms": round(wall_ms, 2),
+                "sample_interval_ms": PROFILE_INTERVAL_SECONDS * 1000,
+                "samples": sum(sampler.stacks.values()),
+                "loop_blocking_spans": monitor.spans,
+                "loop_blocked_ms": round(sum(span["duration_ms"] for span in monitor.spans), 2),
+                # Including this one; above 1 the stacks mix in other requests
+                "concurrent_requests": {"at_start": concurrent_at_start, "peak": peak[0]},
+            }
+            try:
+                await asyncio.to_thread(_write_profile, name, sampler.folded(), meta)
+            except OSError as e:
+                print("Profile write error:", e)
@@ -1,15 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
-from datetime import datetime
-
-from ..ai_generator import generate_topic_nodes, generate_node_detail, generate_node_followup
+from datetime import datetime, timedelta
+
+from ..ai_generator import (
+    generate_topic_nodes,
+    expand_topic_node,
+    generate_node_detail,
+    generate_node_details_batch,
+    generate_node_followup,
+    NODE_DETAIL_SECTIONS
+)
+from ..admission import llm_admission
+from ..scheduler import INTERACTIVE, BULK
+from ..deadlines import request_deadline, llm_calls
+from ..cache import node_cache, node_section_key, node_followup_key
+from ..usage import track_usage, QUOTA_MODE
+from ..export import export_user_history
 from ..database.db import (
     get_challenge_quota,
     create_challenge,
     create_challenge_quota,
     reset_quota_if_needed,
-    get_user_challenges
+    charge_quota,
+    save_topic_content,
+    get_user_challenges,
+    get_usage_by_endpoint,
+    search_user_content
 )
 from ..utils import authenticate_and_get_user_details
 from ..database.models import get_db
@@ -18,11 +36,36 @@ import json
 
 router = APIRouter()
 
+# Per-route defaults, clients may ask for less via X-Request-Timeout
+TOPIC_NODES_TIMEOUT_SECONDS = 30
+NODE_DETAIL_TIMEOUT_SECONDS = 30
+NODE_FOLLOWUP_TIMEOUT_SECONDS = 30
+NODE_DETAILS_BATCH_TIMEOUT_SECONDS = 45
+
+MAX_BATCH_NODE_TITLES = 20
+MAX_SUBTOPICS = 20
+
+
+def _get_quota(db: Session, user_id: str):
+    quota = get_challenge_quota(db, user_id)
+    if not quota:
+        quota = create_challenge_quota(db, user_id)
+
+    quota = reset_quota_if_needed(db, quota)
+
+    if quota.quota_remaining <= 0:
+        raise HTTPException(status_code=429, detail="Quota exhausted")
+    return quota
+
 
 class ChallengeRequest(BaseModel):
     # Updated: accept a topic instead of difficulty for topic-node generation
     topic: str
-    max_subtopics: int = 8
+    max_subtopics: int = Field(8, ge=1, le=MAX_SUBTOPICS)
+    # Tree-aware expansion: path from the root down to (not including) topic,
+    # and titles already present in the user's graph
+    ancestors: list[str] = []
+    existing_titles: list[str] = []
 
     class Config:
         json_schema_extra = {"example": {"topic": "ReactJS", "max_subtopics": 6}}
@@ -32,31 +75,37 @@ class ChallengeRequest(BaseModel):
 async def generate_challenge(request: ChallengeRequest, request_obj: Request, db: Session = Depends(get_db)):
     
     try:
+        deadline = request_deadline(request_obj, TOPIC_NODES_TIMEOUT_SECONDS)
         user_details = authenticate_and_get_user_details(request_obj)
         user_id = str(user_details.get("user_id"))
-
-        quota = get_challenge_quota(db, user_id)
-        if not quota:
-            quota = create_challenge_quota(db, user_id)
-
-        quota = reset_quota_if_needed(db, quota)
-
-        if quota.quota_remaining <= 0:
-            raise HTTPException(status_code=429, detail="Quota exhausted")
-
-        # Generate topic nodes using AI generator
-        try:
-            topic_data = generate_topic_nodes(request.topic, request.max_subtopics)
-        except ValueError as e:
-            raise HTTPException(status_code=400, detail=f"Failed to generate topic nodes: {e}")
-
-        # Deduct quota and commit
-        quota.quota_remaining -= 1
-        db.commit()
+        usage = track_usage(user_id, "generate-challenge")
+
+        quota = _get_quota(db, user_id)
+
+        # Generate topic nodes using AI generator (sheds with 503 when saturated)
+        async with llm_admission.admit(user_id, BULK, deadline):
+            try:
+                if request.ancestors or request.existing_titles:
+                    generation = expand_topic_node(
+                        request.topic, request.max_subtopics, request.ancestors, request.existing_titles
+                    )
+                else:
+                    generation = generate_topic_nodes(request.topic, request.max_subtopics)
+                topic_data = await llm_calls.run(request_obj, deadline, generation, "topic_nodes")
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Failed to generate topic nodes: {e}")
+
+        # Deduct quota and commit - only admitted, completed requests reach this point.
+        # Placeholder trees are neither charged nor saved.
+        fallback = topic_data.get("fallback", False)
+        if not fallback:
+            charge_quota(db, quota, usage.quota_units())
+            save_topic_content(db, user_id, "tree", request.topic, topic_data)
 
         return {
             "topic": topic_data.get("root", request.topic),
             "nodes": topic_data.get("nodes", []),
+            "fallback": fallback,
         }
 
     except HTTPException as e:
@@ -84,6 +133,58 @@ async def my_history(request: Request, db: Session = Depends(get_db)):
     return {"challenges": challenges}
 
 
+@router.get("/export")
+async def export_history(request: Request, gzip: bool = False):
+    """
+    Stream the authenticated user's challenges and saved topic content as
+    NDJSON, one record per line. With ?gzip=true the body is gzip-encoded.
+    """
+    user_details = authenticate_and_get_user_details(request)
+    user_id = str(user_details.get("user_id"))
+
+    headers = {"Content-Disposition": 'attachment; filename="interview-tree-history.ndjson"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        export_user_history(user_id, compress=gzip),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
+
+
+@router.get("/search")
+async def search_content(request: Request, q: str, page: int = 1, page_size: int = 20, db: Session = Depends(get_db)):
+    """
+    Ranked full-text search over the authenticated user's generated topics,
+    definitions and interview Q&A, so existing content can be reopened
+    instead of regenerated.
+    """
+    user_details = authenticate_and_get_user_details(request)
+    user_id = str(user_details.get("user_id"))
+
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty")
+
+    return search_user_content(db, user_id, q, max(1, page), max(1, min(page_size, 50)))
+
+
+@router.get("/usage")
+async def get_usage(request: Request, days: int = 1, db: Session = Depends(get_db)):
+    """
+    Token and latency totals per endpoint for the authenticated user.
+    """
+    user_details = authenticate_and_get_user_details(request)
+    user_id = str(user_details.get("user_id"))
+
+    since = datetime.now() - timedelta(days=max(1, min(days, 90)))
+    return {
+        "quota_mode": QUOTA_MODE,
+        "since": since.isoformat(),
+        "endpoints": get_usage_by_endpoint(db, since, user_id),
+    }
+
+
 # @router.get("/quota")
 # async def get_quota(request: Request, db: Session = Depends(get_db)):
 #     """
@@ -154,6 +255,14 @@ class NodeDetailRequest(BaseModel):
     topic: str
     node_title: str
     followup: str | None = None
+    # Subset of NODE_DETAIL_SECTIONS to generate; None means all of them
+    sections: list[str] | None = None
+
+class NodeDetailsBatchRequest(BaseModel):
+    topic: str
+    node_titles: list[str]
+    sections: list[str] | None = None
+
 
 class NodeFollowupRequest(BaseModel):
     topic: str
@@ -165,16 +274,122 @@ class NodeFollowupRequest(BaseModel):
 async def generate_node_detail_endpoint(request: NodeDetailRequest, request_obj: Request, db: Session = Depends(get_db)):
     """
     Generate a detailed explanation for a single node inside a topic tree.
+
+    Only the requested sections are generated; cached sections are served
+    without an LLM call, so clients can fetch the definition first and the
+    remaining sections on demand.
     """
     user_details = authenticate_and_get_user_details(request_obj)
     if not user_details:
         raise HTTPException(status_code=401, detail="Invalid or missing auth token")
+    user_id = str(user_details.get("user_id"))
 
-    try:
-        detail = generate_node_detail(request.topic, request.node_title, request.followup)
-        return detail
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate node detail: {e}")
+    usage = track_usage(user_id, "generate-node-detail")
+
+    sections = request.sections or list(NODE_DETAIL_SECTIONS)
+    unknown = [section for section in sections if section not in NODE_DETAIL_SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sections: {unknown}")
+
+    detail = {"title": request.node_title}
+    missing = sections
+    if not request.followup:
+        missing = []
+        for section in sections:
+            cached = node_cache.get(node_section_key(request.topic, request.node_title, section))
+            if cached is None:
+                missing.append(section)
+            else:
+                detail[section] = cached
+        if not missing:
+            return detail
+
+    # In token mode every generation is charged by the tokens it actually used
+    quota = _get_quota(db, user_id) if QUOTA_MODE == "tokens" else None
+
+    deadline = request_deadline(request_obj, NODE_DETAIL_TIMEOUT_SECONDS)
+    async with llm_admission.admit(user_id, INTERACTIVE, deadline):
+        try:
+            generated = await llm_calls.run(
+                request_obj,
+                deadline,
+                generate_node_detail(request.topic, request.node_title, request.followup, missing),
+                "node_detail",
+            )
+            detail.update(generated)
+            if generated.get("fallback"):
+                return detail
+            if quota is not None:
+                charge_quota(db, quota, usage.quota_units())
+            save_topic_content(db, user_id, "node_detail", request.topic, generated, request.node_title)
+            return detail
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to generate node detail: {e}")
+
+
+@router.post("/generate-node-details-batch")
+async def generate_node_details_batch_endpoint(request: NodeDetailsBatchRequest, request_obj: Request, db: Session = Depends(get_db)):
+    """
+    Generate details for several sibling nodes at once, e.g. to prefetch a
+    freshly generated tree. Siblings are packed into shared completions and
+    every section lands in the same cache /generate-node-detail reads from.
+    Nodes that could not be generated are left out of "details".
+    """
+    user_details = authenticate_and_get_user_details(request_obj)
+    if not user_details:
+        raise HTTPException(status_code=401, detail="Invalid or missing auth token")
+    user_id = str(user_details.get("user_id"))
+
+    usage = track_usage(user_id, "generate-node-details-batch")
+
+    if len(request.node_titles) > MAX_BATCH_NODE_TITLES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_NODE_TITLES} node titles per batch")
+
+    sections = request.sections or list(NODE_DETAIL_SECTIONS)
+    unknown = [section for section in sections if section not in NODE_DETAIL_SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sections: {unknown}")
+
+    details = {}
+    missing = []
+    for title in dict.fromkeys(request.node_titles):
+        detail = {"title": title}
+        for section in sections:
+            cached = node_cache.get(node_section_key(request.topic, title, section))
+            if cached is None:
+                break
+            detail[section] = cached
+        else:
+            details[title] = detail
+            continue
+        missing.append(title)
+
+    if not missing:
+        return {"details": details}
+
+    quota = _get_quota(db, user_id) if QUOTA_MODE == "tokens" else None
+
+    deadline = request_deadline(request_obj, NODE_DETAILS_BATCH_TIMEOUT_SECONDS)
+    async with llm_admission.admit(user_id, BULK, deadline):
+        try:
+            generated = await llm_calls.run(
+                request_obj,
+                deadline,
+                generate_node_details_batch(request.topic, missing, sections),
+                "node_details_batch",
+            )
+            details.update(generated)
+            if quota is not None and generated:
+                charge_quota(db, quota, usage.quota_units())
+            for title, detail in generated.items():
+                save_topic_content(db, user_id, "node_detail", request.topic, detail, title)
+            return {"details": details}
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to generate node details: {e}")
 
 
 @router.post("/generate-node-followup")
@@ -185,9 +400,31 @@ async def generate_node_followup_endpoint(request: NodeFollowupRequest, request_
     user_details = authenticate_and_get_user_details(request_obj)
     if not user_details:
         raise HTTPException(status_code=401, detail="Invalid or missing auth token")
+    user_id = str(user_details.get("user_id"))
 
-    try:
-        answer = generate_node_followup(request.topic, request.node_title, request.followup)
-        return {"answer": answer}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate follow-up: {e}")
\ No newline at end of file
+    usage = track_usage(user_id, "generate-node-followup")
+
+    cached = node_cache.get(node_followup_key(request.topic, request.node_title, request.followup))
+    if cached is not None:
+        return {"answer": cached, "truncated": False}
+
+    quota = _get_quota(db, user_id) if QUOTA_MODE == "tokens" else None
+
+    deadline = request_deadline(request_obj, NODE_FOLLOWUP_TIMEOUT_SECONDS)
+    async with llm_admission.admit(user_id, INTERACTIVE, deadline):
+        try:
+            result = await llm_calls.run(
+                request_obj, deadline, generate_node_followup(request.topic, request.node_title, request.followup), "node_followup"
+            )
+            if result.get("fallback"):
+                return result
+            if quota is not None:
+                charge_quota(db, quota, usage.quota_units())
+            save_topic_content(
+                db, user_id, "followup", request.topic, {"question": request.followup, **result}, request.node_title
+            )
+            return result
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to generate follow-up: {e}")
\ No newline at end of file
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+import hmac
+import os
+
+from ..admission import llm_admission
+from ..deadlines import llm_calls
+from ..cache import node_cache
+from ..usage import usage_ledger, generation_stats, QUOTA_MODE
+from ..database.db import get_usage_by_user, get_usage_by_endpoint
+from ..database.models import get_db
+
+router = APIRouter()
+
+# Send "X-Admin-Token: <ADMIN_TOKEN>" to read the admin routes; unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def require_admin(request: Request):
+    """
+    Reject the request unless it carries the configured admin token.
+    """
+    token = request.headers.get("x-admin-token", "")
+    if not ADMIN_TOKEN or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Operational counters for the LLM-backed routes.
+    """
+    return {
+        "admission": llm_admission.stats(),
+        "llm_calls": llm_calls.stats(),
+        "node_cache": node_cache.stats(),
+        "usage_ledger": usage_ledger.stats(),
+        "generation": generation_stats.stats(),
+    }
+
+
+@router.get("/admin/usage", dependencies=[Depends(require_admin)])
+async def get_admin_usage(days: int = 1, db: Session = Depends(get_db)):
+    """
+    Token, latency, fallback and escalation totals across all users, per user and per endpoint.
+    """
+    since = datetime.now() - timedelta(days=max(1, min(days, 90)))
+    return {
+        "quota_mode": QUOTA_MODE,
+        "since": since.isoformat(),
+        "users": get_usage_by_user(db, since),
+        "endpoints": get_usage_by_endpoint(db, since),
+    }
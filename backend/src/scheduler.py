@@ -0,0 +1,156 @@
+import asyncio
+from collections import OrderedDict, deque
+from typing import Dict, Optional
+
+# --- Priority classes ---
+INTERACTIVE = "interactive"   # node detail, follow-up: a user is waiting on a modal
+BULK = "bulk"                 # tree generation / node expansion
+PRIORITIES = (INTERACTIVE, BULK)
+
+
+class QueueDisplaced(Exception):
+    """
+    Set on a waiter that was dropped to make room for a lighter user.
+    """
+
+
+class FairScheduler:
+    """
+    Hands out a fixed number of concurrency slots across users.
+
+    Waiters are grouped into per-user queues inside each priority class.
+    Interactive work is always served before bulk work; within a class users
+    are served round-robin, each getting `weight` consecutive grants per turn.
+    A single heavy user therefore only ever holds its fair share of the slots
+    that free up while others are waiting.
+    """
+
+    def __init__(self, capacity: int, weights: Optional[Dict[str, int]] = None):
+        self.capacity = capacity
+        self.weights = weights or {}
+        self.in_flight = 0
+        self._queues = {priority: OrderedDict() for priority in PRIORITIES}
+        self._credits: Dict[str, int] = {}
+
+    def weight_for(self, user_id: str) -> int:
+        return max(1, self.weights.get(user_id, 1))
+
+    def waiting(self, priority: Optional[str] = None) -> int:
+        priorities = (priority,) if priority else PRIORITIES
+        return sum(len(waiters) for p in priorities for waiters in self._queues[p].values())
+
+    def waiting_for(self, user_id: str) -> int:
+        return sum(len(self._queues[p].get(user_id, ())) for p in PRIORITIES)
+
+    def displace(self, user_id: str) -> bool:
+        """
+        Make room in a full queue for user_id by dropping the newest waiter of
+        the user with the most queued requests, as long as that user would
+        still have more queued than user_id afterwards. Bulk waiters go first.
+        Returns False when nobody is heavy enough to displace.
+        """
+        totals: Dict[str, int] = {}
+        for priority in PRIORITIES:
+            for user, waiters in self._queues[priority].items():
+                totals[user] = totals.get(user, 0) + len(waiters)
+        if not totals:
+            return False
+
+        victim = max(totals, key=totals.get)
+        if totals[victim] < self.waiting_for(user_id) + 2:
+            return False
+
+        for priority in reversed(PRIORITIES):
+            waiters = self._queues[priority].get(victim)
+            if not waiters:
+                continue
+            fut = waiters.pop()
+            if not waiters:
+                del self._queues[priority][victim]
+                self._credits.pop(victim, None)
+            fut.set_exception(QueueDisplaced())
+            return True
+        return False
+
+    def try_acquire(self) -> bool:
+        """
+        Take a free slot without waiting, unless someone is already queued.
+        """
+        if self.in_flight < self.capacity and not self.waiting():
+            self.in_flight += 1
+            return True
+        return False
+
+    def enqueue(self, user_id: str, priority: str = BULK) -> asyncio.Future:
+        """
+        Queue a waiter right away; the future resolves once a slot is granted.
+        """
+        fut = asyncio.get_running_loop().create_future()
+        self._queues[priority].setdefault(user_id, deque()).append(fut)
+        return fut
+
+    def withdraw(self, user_id: str, priority: str, fut: asyncio.Future):
+        """
+        Give up a queued waiter that stopped waiting (timeout/cancellation).
+        """
+        if fut.done() and not fut.cancelled() and fut.exception() is None:
+            # Slot was granted right as the waiter gave up - hand it on
+            self.release()
+        else:
+            self._discard(priority, user_id, fut)
+
+    def release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _discard(self, priority: str, user_id: str, fut: asyncio.Future):
+        waiters = self._queues[priority].get(user_id)
+        if waiters is None:
+            return
+        try:
+            waiters.remove(fut)
+        except ValueError:
+            pass
+        if not waiters:
+            del self._queues[priority][user_id]
+            self._credits.pop(user_id, None)
+
+    def _dispatch(self):
+        while self.in_flight < self.capacity:
+            fut = self._next_waiter()
+            if fut is None:
+                return
+            if fut.done():
+                continue
+            self.in_flight += 1
+            fut.set_result(None)
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        for priority in PRIORITIES:
+            users = self._queues[priority]
+            if not users:
+                continue
+
+            user_id, waiters = next(iter(users.items()))
+            fut = waiters.popleft()
+            credits = self._credits.get(user_id, self.weight_for(user_id)) - 1
+
+            if not waiters:
+                del users[user_id]
+                self._credits.pop(user_id, None)
+            elif credits <= 0:
+                # Turn is over - go to the back of the round-robin
+                users.move_to_end(user_id)
+                self._credits[user_id] = self.weight_for(user_id)
+            else:
+                self._credits[user_id] = credits
+            return fut
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "waiting": {priority: self.waiting(priority) for priority in PRIORITIES},
+            "waiting_users": len({user for p in PRIORITIES for user in self._queues[p]}),
+        }
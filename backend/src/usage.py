@@ -0,0 +1,272 @@
+import math
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import insert
+from dotenv import load_dotenv
+
+from .database.models import SessionLocal, LLMUsage
+
+load_dotenv()
+
+# --- Settings ---
+LEDGER_BATCH_SIZE = int(os.getenv("USAGE_LEDGER_BATCH_SIZE", "200"))
+LEDGER_FLUSH_SECONDS = float(os.getenv("USAGE_LEDGER_FLUSH_SECONDS", "2"))
+LEDGER_MAX_BUFFER = int(os.getenv("USAGE_LEDGER_MAX_BUFFER", "10000"))
+
+# "requests" charges one quota unit per generation, "tokens" charges per TOKENS_PER_QUOTA_UNIT tokens
+QUOTA_MODE = os.getenv("QUOTA_MODE", "requests")
+TOKENS_PER_QUOTA_UNIT = int(os.getenv("TOKENS_PER_QUOTA_UNIT", "1000"))
+
+# Latency/size percentiles per task are computed over this many recent calls
+GENERATION_STATS_WINDOW = int(os.getenv("GENERATION_STATS_WINDOW", "1000"))
+
+
+class UsageContext:
+    """
+    Who an LLM call is made for, plus the tokens spent so far in this request.
+    """
+
+    def __init__(self, user_id: Optional[str], endpoint: str):
+        self.user_id = user_id
+        self.endpoint = endpoint
+        self.tokens = 0
+
+    def quota_units(self) -> int:
+        if QUOTA_MODE != "tokens":
+            return 1
+        return max(1, math.ceil(self.tokens / TOKENS_PER_QUOTA_UNIT))
+
+
+usage_context: ContextVar[Optional[UsageContext]] = ContextVar("usage_context", default=None)
+
+
+def track_usage(user_id: Optional[str], endpoint: str) -> UsageContext:
+    """
+    Attribute every LLM call made by the current request to this user/endpoint.
+    """
+    context = UsageContext(user_id, endpoint)
+    usage_context.set(context)
+    return context
+
+
+class UsageLedger:
+    """
+    Buffers usage rows in memory and bulk-inserts them from a background
+    thread, so recording a call never waits on the database.
+    """
+
+    _STOP = object()
+
+    def __init__(self, batch_size: int, flush_seconds: float, max_buffer: int):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_buffer)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.failed_batches = 0
+
+    def record(self, row: dict):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="usage-ledger", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            flush_at = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size and batch[-1] is not self._STOP:
+                remaining = flush_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            rows = [row for row in batch if row is not self._STOP]
+            if rows:
+                self._write(rows)
+            if len(rows) != len(batch):
+                return
+
+    def _write(self, rows: list):
+        db = SessionLocal()
+        try:
+            db.execute(insert(LLMUsage), rows)
+            db.commit()
+            self.written += len(rows)
+        except Exception as e:
+            db.rollback()
+            self.failed_batches += 1
+            print("Usage ledger write error:", e)
+        finally:
+            db.close()
+
+    def close(self, timeout: float = 5):
+        """
+        Flush whatever is buffered and stop the writer thread.
+        """
+        if self._thread is None:
+            return
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "buffered": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_batches": self.failed_batches,
+        }
+
+
+usage_ledger = UsageLedger(LEDGER_BATCH_SIZE, LEDGER_FLUSH_SECONDS, LEDGER_MAX_BUFFER)
+
+
+def _percentiles(samples) -> dict:
+    if not samples:
+        return {"p50": 0, "p90": 0, "p99": 0, "max": 0}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        "p50": ordered[int(last * 0.50)],
+        "p90": ordered[int(last * 0.90)],
+        "p99": ordered[int(last * 0.99)],
+        "max": ordered[last],
+    }
+
+
+class TaskStats:
+    """
+    Counters plus a rolling window of latency and output size for one task.
+    """
+
+    def __init__(self, window: int):
+        self.calls = 0
+        self.fallbacks = 0
+        self.escalations = 0
+        self.truncated = 0
+        self.models: Dict[str, int] = {}
+        self.latency_ms: "deque[int]" = deque(maxlen=window)
+        self.completion_tokens: "deque[int]" = deque(maxlen=window)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "fallbacks": self.fallbacks,
+            "escalations": self.escalations,
+            "truncated": self.truncated,
+            "models": dict(self.models),
+            "latency_ms": _percentiles(self.latency_ms),
+            "completion_tokens": _percentiles(self.completion_tokens),
+        }
+
+
+class GenerationStats:
+    """
+    Per-task latency and output-size distributions, exported on /api/metrics.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._tasks: Dict[str, TaskStats] = {}
+
+    def record(self, task: str, model: str, latency_ms: int, completion_tokens: int,
+               fallback: bool, escalated: bool, truncated: bool):
+        stats = self._tasks.get(task)
+        if stats is None:
+            stats = self._tasks[task] = TaskStats(self.window)
+        stats.calls += 1
+        stats.fallbacks += fallback
+        stats.escalations += escalated
+        stats.truncated += truncated
+        stats.models[model] = stats.models.get(model, 0) + 1
+        stats.latency_ms.append(latency_ms)
+        stats.completion_tokens.append(completion_tokens)
+
+    def stats(self) -> dict:
+        return {task: stats.stats() for task, stats in sorted(self._tasks.items())}
+
+
+generation_stats = GenerationStats(GENERATION_STATS_WINDOW)
+
+
+class LLMCall:
+    """
+    Wraps one chat completion so its tokens and latency end up in the ledger.
+
+        call = LLMCall("node_detail")
+        response = await call.create(client, model=..., messages=...)
+        ...
+        call.record()               # or call.record(fallback=True)
+    """
+
+    def __init__(self, task: str, escalated: bool = False):
+        self.task = task
+        self.escalated = escalated
+        self.model = ""
+        self.response = None
+        self.latency_ms = 0
+
+    @property
+    def truncated(self) -> bool:
+        """
+        True when the completion stopped because it hit max_tokens.
+        """
+        choices = getattr(self.response, "choices", None) or [None]
+        return getattr(choices[0], "finish_reason", None) == "length"
+
+    async def create(self, client, **kwargs):
+        self.model = kwargs.get("model", "")
+        started = time.perf_counter()
+        try:
+            self.response = await client.chat.completions.create(**kwargs)
+        finally:
+            self.latency_ms = int((time.perf_counter() - started) * 1000)
+        return self.response
+
+    def record(self, fallback: bool = False):
+        usage = getattr(self.response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+
+        context = usage_context.get()
+        if context is not None:
+            context.tokens += prompt_tokens + completion_tokens
+
+        usage_ledger.record({
+            "user_id": context.user_id if context else None,
+            "endpoint": context.endpoint if context else None,
+            "task": self.task,
+            "model": self.model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "latency_ms": self.latency_ms,
+            "fallback": fallback,
+            "escalated": self.escalated,
+            "created_at": datetime.now(),
+        })
+        generation_stats.record(
+            self.task, self.model, self.latency_ms, completion_tokens,
+            fallback=fallback, escalated=self.escalated, truncated=self.truncated,
+        )
@@ -0,0 +1,20 @@
+import os
+import tempfile
+
+import pytest
+
+# src.database.models builds its engine at import time; point it at a
+# throwaway SQLite file before any test module imports it
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="interview-tree-tests-"), "test.db")
+# The Groq client is built at import time too; tests never reach the API
+os.environ.setdefault("GROQ_API_KEY", "test")
+# Keep the node cache in memory only
+os.environ["NODE_CACHE_COLD_PATH"] = ""
+
+
+@pytest.fixture(scope="session", autouse=True)
+def flush_usage_ledger():
+    # Write buffered usage rows while pytest still owns the log streams
+    yield
+    from src.usage import usage_ledger
+    usage_ledger.close()
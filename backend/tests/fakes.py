@@ -0,0 +1,27 @@
+from types import SimpleNamespace
+
+from src import ai_generator
+
+
+class FakeCompletions:
+    """
+    Stands in for client.chat.completions; replies are (content, finish_reason) per call.
+    """
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        content, finish_reason = self.replies.pop(0)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)],
+            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=20),
+        )
+
+
+def use_fake_client(monkeypatch, replies):
+    completions = FakeCompletions(replies)
+    monkeypatch.setattr(ai_generator, "client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    return completions
@@ -0,0 +1,124 @@
+import itertools
+import json
+import os
+
+import pytest
+
+from src import cache
+from src.cache import ByteLRU, CompressedDiskStore, TieredCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Strictly increasing access times so cold-tier LRU order is deterministic
+    ticks = itertools.count(1)
+    monkeypatch.setattr(cache.time, "time", lambda: float(next(ticks)))
+
+
+def _value(i: int, size: int = 1000) -> dict:
+    return {"definition": f"entry {i} " + "x" * size}
+
+
+def _encoded(value) -> int:
+    return len(json.dumps(value).encode("utf-8"))
+
+
+def _tiered(tmp_path, hot_bytes: int, cold_bytes: int = 1024 * 1024) -> TieredCache:
+    return TieredCache(ByteLRU(hot_bytes), CompressedDiskStore(str(tmp_path / "cold.sqlite3"), cold_bytes))
+
+
+def test_byte_lru_evicts_least_recent_to_stay_in_budget():
+    lru = ByteLRU(max_bytes=250)
+    assert lru.put("a", "A", 100) == []
+    assert lru.put("b", "B", 100) == []
+    lru.get("a")  # "b" is now least recently used
+    assert lru.put("c", "C", 100) == [("b", "B")]
+    assert lru.current_bytes == 200
+    assert lru.get("b") is None and lru.get("a") == "A"
+
+
+def test_byte_lru_replacing_a_key_does_not_double_count():
+    lru = ByteLRU(max_bytes=1000)
+    lru.put("a", "A", 300)
+    lru.put("a", "A2", 500)
+    assert lru.current_bytes == 500
+
+
+def test_hot_eviction_demotes_to_cold(tmp_path, clock):
+    size = _encoded(_value(0))
+    tiered = _tiered(tmp_path, hot_bytes=2 * size)
+    for i in range(3):
+        tiered.put(f"k{i}", _value(i))
+
+    assert tiered.hot.stats()["entries"] == 2
+    assert tiered.cold.stats()["entries"] == 1
+    assert tiered.cold.get("k0") is not None
+
+
+def test_cold_hit_is_promoted_to_hot(tmp_path, clock):
+    size = _encoded(_value(0))
+    tiered = _tiered(tmp_path, hot_bytes=2 * size)
+    for i in range(3):
+        tiered.put(f"k{i}", _value(i))
+
+    assert tiered.get("k0") == _value(0)
+    assert "k0" in tiered.hot._data
+    # Promoting k0 pushed the oldest hot entry (k1) down instead
+    assert "k1" not in tiered.hot._data and tiered.cold.get("k1") is not None
+
+
+def test_value_larger_than_hot_budget_goes_straight_to_cold(tmp_path, clock):
+    tiered = _tiered(tmp_path, hot_bytes=100)
+    tiered.put("big", _value(0, size=5000))
+    assert tiered.hot.stats()["entries"] == 0
+    assert tiered.get("big") == _value(0, size=5000)
+
+
+def test_cold_tier_evicts_by_compressed_bytes(tmp_path, clock):
+    store = CompressedDiskStore(str(tmp_path / "cold.sqlite3"), max_bytes=10_000)
+    # Highly compressible: 50 KB raw each, tiny on disk, so all fit
+    for i in range(5):
+        store.put(f"compressible{i}", json.dumps(_value(i, size=50_000)).encode())
+    assert store.stats()["entries"] == 5
+    assert store.current_bytes <= store.max_bytes
+
+    # Incompressible entries push out the least recently accessed ones
+    store.get("compressible0")
+    for i in range(2):
+        store.put(f"random{i}", os.urandom(4900))
+    assert store.current_bytes <= store.max_bytes
+    assert store.get("compressible1") is None
+    assert store.get("compressible0") is not None
+    assert store.get("random0") is not None and store.get("random1") is not None
+
+
+def test_cold_tier_keeps_byte_count_across_reopen(tmp_path, clock):
+    path = str(tmp_path / "cold.sqlite3")
+    store = CompressedDiskStore(path, max_bytes=1_000_000)
+    store.put("a", b"hello" * 100)
+    assert CompressedDiskStore(path, max_bytes=1_000_000).current_bytes == store.current_bytes
+
+
+def test_per_tier_hit_rates(tmp_path, clock):
+    size = _encoded(_value(0))
+    tiered = _tiered(tmp_path, hot_bytes=size)
+    tiered.put("a", _value(0))
+    tiered.put("b", _value(1))   # demotes "a"
+
+    tiered.get("b")              # hot hit
+    tiered.get("a")              # hot miss, cold hit (promoted, demotes "b")
+    tiered.get("missing")        # hot miss, cold miss
+
+    stats = tiered.stats()
+    assert (stats["hot"]["hits"], stats["hot"]["misses"]) == (1, 2)
+    assert (stats["cold"]["hits"], stats["cold"]["misses"]) == (1, 1)
+    assert stats["hot"]["hit_rate"] == round(1 / 3, 4)
+    assert stats["cold"]["hit_rate"] == 0.5
+    assert stats["hit_rate"] == round(2 / 3, 4)
+
+
+def test_memory_only_when_cold_tier_disabled():
+    tiered = TieredCache(ByteLRU(100), None)
+    tiered.put("big", _value(0))
+    assert tiered.get("big") is None
+    assert tiered.stats()["cold"] is None
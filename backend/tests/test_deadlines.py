@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.admission import AdmissionController
+from src.cache import node_cache
+from src.deadlines import CancellationTracker, Deadline, CLIENT_CLOSED_REQUEST
+
+
+class StubRequest:
+    """
+    Just enough of a Starlette Request for CancellationTracker.run.
+    """
+
+    def __init__(self, disconnect_after: float = None):
+        self.disconnect_after = disconnect_after
+        self.started = None
+
+    async def is_disconnected(self) -> bool:
+        loop = asyncio.get_running_loop()
+        if self.started is None:
+            self.started = loop.time()
+        return self.disconnect_after is not None and loop.time() - self.started >= self.disconnect_after
+
+
+class FakeGeneration:
+    """
+    A generation that takes `seconds` and caches its result when it finishes.
+    """
+
+    def __init__(self, seconds: float, cache_key: str = None):
+        self.seconds = seconds
+        self.cache_key = cache_key
+        self.started = False
+        self.cancelled = False
+
+    async def __call__(self):
+        self.started = True
+        try:
+            await asyncio.sleep(self.seconds)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.cache_key:
+            node_cache.put(self.cache_key, "done")
+        return "done"
+
+
+def _run(tracker, request, deadline, generation, name="task"):
+    async def scenario():
+        return await tracker.run(request, deadline, generation(), name)
+    return asyncio.run(scenario())
+
+
+def test_completes_and_learns_latency():
+    tracker = CancellationTracker()
+    assert _run(tracker, StubRequest(), Deadline(5), FakeGeneration(0.05)) == "done"
+    assert tracker.stats()["completed"] == 1
+    assert tracker.stats()["expected_latency_seconds"]["task"] > 0
+
+
+def test_deadline_expiry_cancels_generation():
+    tracker = CancellationTracker()
+    generation = FakeGeneration(5)
+    with pytest.raises(HTTPException) as exc:
+        _run(tracker, StubRequest(), Deadline(0.1), generation)
+    assert exc.value.status_code == 504
+    assert generation.cancelled
+    assert tracker.stats()["deadline_exceeded"] == 1
+
+
+def test_disconnect_cancels_generation():
+    tracker = CancellationTracker()
+    generation = FakeGeneration(5)
+    with pytest.raises(HTTPException) as exc:
+        _run(tracker, StubRequest(disconnect_after=0.1), Deadline(10), generation)
+    assert exc.value.status_code == CLIENT_CLOSED_REQUEST
+    assert generation.cancelled
+    assert tracker.stats()["disconnects"] == 1
+
+
+def test_client_gone_before_start_never_starts_generation():
+    tracker = CancellationTracker()
+    generation = FakeGeneration(5)
+    with pytest.raises(HTTPException) as exc:
+        _run(tracker, StubRequest(disconnect_after=0), Deadline(10), generation)
+    assert exc.value.status_code == CLIENT_CLOSED_REQUEST
+    assert not generation.started
+
+
+def test_nearly_finished_generation_gets_grace_and_lands_in_cache():
+    tracker = CancellationTracker()
+    # Past runs took ~0.6s; the disconnect is seen at the 0.5s poll, which is
+    # past NEARLY_COMPLETE_RATIO of the expected latency
+    tracker._record_latency("graced", 0.6)
+    generation = FakeGeneration(0.6, cache_key="test:graced")
+
+    request = StubRequest(disconnect_after=0.3)
+    with pytest.raises(HTTPException) as exc:
+        _run(tracker, request, Deadline(10), generation, "graced")
+    assert exc.value.status_code == CLIENT_CLOSED_REQUEST
+    assert not generation.cancelled
+    assert node_cache.get("test:graced") == "done"
+    assert tracker.stats()["finished_after_cancel"] == 1
+
+
+def test_early_disconnect_gets_no_grace():
+    tracker = CancellationTracker()
+    tracker._record_latency("early", 1.0)
+    generation = FakeGeneration(1.0, cache_key="test:early")
+    with pytest.raises(HTTPException):
+        _run(tracker, StubRequest(disconnect_after=0.1), Deadline(10), generation, "early")
+    assert generation.cancelled
+    assert node_cache.get("test:early") is None
+
+
+def test_admission_slot_released_on_cancellation():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=5, retry_after=1)
+        tracker = CancellationTracker()
+        for request, deadline in ((StubRequest(disconnect_after=0.1), Deadline(10)), (StubRequest(), Deadline(0.1))):
+            with pytest.raises(HTTPException):
+                async with controller.admit("user", deadline=deadline):
+                    await tracker.run(request, deadline, FakeGeneration(5)(), "task")
+            assert controller.in_flight == 0
+        return controller.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["admitted"] == 2 and stats["queue_depth"] == 0
@@ -0,0 +1,80 @@
+import gzip
+import json
+import tracemalloc
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from src.database.models import SessionLocal, Challenge, TopicContent
+from src.export import export_user_history
+
+# Export is checked at each of these history sizes, rows split evenly between the two tables
+ROW_COUNTS = (10_000, 50_000, 200_000)
+INSERT_BATCH = 10_000
+
+
+def _add_rows(user_id: str, start: int, stop: int):
+    now = datetime.now()
+    db = SessionLocal()
+    try:
+        for batch_start in range(start, stop, INSERT_BATCH):
+            ids = range(batch_start, min(batch_start + INSERT_BATCH, stop))
+            db.execute(insert(Challenge), [{
+                "difficulty": "medium",
+                "date_created": now,
+                "created_by": user_id,
+                "title": f"Challenge {i}",
+                "options": json.dumps(["a", "b", "c", "d"]),
+                "correct_answer_id": 0,
+                "explanation": "Because. " * 10,
+            } for i in ids])
+            db.execute(insert(TopicContent), [{
+                "user_id": user_id,
+                "kind": "node_detail",
+                "topic": "ReactJS",
+                "node_title": f"Node {i}",
+                "content": json.dumps({"title": f"Node {i}", "definition": "Definition text. " * 20}),
+                "created_at": now,
+            } for i in ids])
+        db.commit()
+    finally:
+        db.close()
+
+
+def _export_peak(user_id: str):
+    """
+    Drains the export and returns (lines exported, peak traced bytes).
+    """
+    lines = 0
+    tracemalloc.start()
+    try:
+        for chunk in export_user_history(user_id):
+            lines += chunk.count(b"\n")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return lines, peak
+
+
+def test_export_peak_memory_is_flat_in_history_size():
+    peaks = []  # tracemalloc peak while draining the export at each size
+    added = 0
+    for count in ROW_COUNTS:
+        _add_rows("export-user", added, count // 2)
+        added = count // 2
+
+        lines, peak = _export_peak("export-user")
+        assert lines == count
+        peaks.append(peak)
+
+    # 20x more rows must not mean meaningfully more memory
+    assert peaks[-1] < peaks[0] * 1.5, [f"{p / 1024:.0f} KiB" for p in peaks]
+    assert peaks[-1] < 8 * 1024 * 1024
+
+
+def test_gzip_export_round_trips():
+    _add_rows("gzip-user", 0, 100)
+    body = b"".join(export_user_history("gzip-user", compress=True))
+    records = [json.loads(line) for line in gzip.decompress(body).splitlines()]
+    assert {record["type"] for record in records} == {"challenge", "topic_content"}
+    assert len(records) == 200
@@ -0,0 +1,76 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import ai_generator, usage
+from src.app import app
+from src.database.db import get_challenge_quota
+from src.database.models import SessionLocal, TopicContent
+from src.routes import challenge
+from tests.fakes import use_fake_client
+
+
+class FailingCompletions:
+    async def create(self, **kwargs):
+        raise RuntimeError("upstream unavailable")
+
+
+@pytest.fixture
+def user_id(monkeypatch):
+    user_id = f"fallback-{uuid.uuid4().hex}"
+    monkeypatch.setattr(challenge, "authenticate_and_get_user_details", lambda request: {"user_id": user_id})
+    monkeypatch.setattr(ai_generator, "client", SimpleNamespace(chat=SimpleNamespace(completions=FailingCompletions())))
+    monkeypatch.setattr(challenge, "QUOTA_MODE", "tokens")
+    monkeypatch.setattr(usage, "QUOTA_MODE", "tokens")
+    return user_id
+
+
+def _saved_and_remaining(user_id):
+    db = SessionLocal()
+    try:
+        saved = db.query(TopicContent).filter(TopicContent.user_id == user_id).count()
+        quota = get_challenge_quota(db, user_id)
+        return saved, quota.quota_remaining if quota else None
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/api/generate-challenge", {"topic": "Fallback Tree"}),
+    ("/api/generate-challenge", {"topic": "Fallback Tree", "ancestors": ["Root"], "existing_titles": ["Other"]}),
+    ("/api/generate-node-detail", {"topic": "Fallback Detail", "node_title": "Node", "sections": ["definition"]}),
+    ("/api/generate-node-followup", {"topic": "Fallback Followup", "node_title": "Node", "followup": "Why?"}),
+])
+def test_placeholder_output_is_flagged_not_saved_or_charged(user_id, path, body):
+    response = TestClient(app).post(path, json=body)
+
+    assert response.status_code == 200
+    assert response.json()["fallback"] is True
+    assert _saved_and_remaining(user_id) == (0, 20)
+
+
+def test_generated_tree_is_saved_and_charged(monkeypatch, user_id):
+    use_fake_client(monkeypatch, [('{"root": "Saved Tree", "nodes": [{"id": "1", "title": "Sub", "children": []}]}', "stop")])
+
+    response = TestClient(app).post("/api/generate-challenge", json={"topic": "Saved Tree", "max_subtopics": 1})
+
+    assert response.json() == {"topic": "Saved Tree", "nodes": [{"id": "1", "title": "Sub"}], "fallback": False}
+    assert _saved_and_remaining(user_id) == (1, 19)
+
+
+def test_expansion_with_some_novel_nodes_is_not_a_fallback(monkeypatch):
+    replies = [{"root": "T", "nodes": [{"id": "1", "title": "New"}]}]
+
+    async def fake_request(topic, max_subtopics, ancestors=None, exclude_titles=None, fallback_on_failure=True):
+        if not replies:
+            raise ValueError("top-up failed")
+        return replies.pop(0)
+
+    monkeypatch.setattr(ai_generator, "_request_topic_nodes", fake_request)
+    result = asyncio.run(ai_generator.expand_topic_node("T", 3, [], []))
+
+    assert [node["title"] for node in result["nodes"]] == ["New"]
+    assert "fallback" not in result
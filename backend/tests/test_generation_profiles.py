@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+from src import ai_generator
+from src.cache import node_cache, node_followup_key
+from tests.fakes import use_fake_client
+
+
+def _topic_json(count):
+    return json.dumps({"root": "Topic", "nodes": [{"id": str(i), "title": f"Sub {i}"} for i in range(1, count + 1)]})
+
+
+def test_truncated_followup_is_flagged_and_not_cached(monkeypatch):
+    use_fake_client(monkeypatch, [("Partial answer with ```python\nprint(", "length")])
+    result = asyncio.run(ai_generator.generate_node_followup("Python", "Lists", "How do I sort?"))
+    assert result == {"answer": "Partial answer with ```python\nprint(", "truncated": True}
+    assert node_cache.get(node_followup_key("Python", "Lists", "How do I sort?")) is None
+
+
+def test_complete_followup_is_cached(monkeypatch):
+    use_fake_client(monkeypatch, [("Use sorted().", "stop")])
+    result = asyncio.run(ai_generator.generate_node_followup("Python", "Lists", "How do I sort a copy?"))
+    assert result == {"answer": "Use sorted().", "truncated": False}
+    assert node_cache.get(node_followup_key("Python", "Lists", "How do I sort a copy?")) == "Use sorted()."
+
+
+def test_topic_nodes_cap_scales_with_subtopics(monkeypatch):
+    completions = use_fake_client(monkeypatch, [(_topic_json(3), "stop"), (_topic_json(15), "stop")])
+    asyncio.run(ai_generator.generate_topic_nodes("Topic", 3))
+    asyncio.run(ai_generator.generate_topic_nodes("Topic", 15))
+    small, large = (call["max_tokens"] for call in completions.calls)
+    assert small < large
+    assert large >= 15 * ai_generator.TASK_PROFILES["topic_nodes"]["max_tokens_per_item"]
+
+
+def test_truncated_json_retries_same_model_with_larger_cap(monkeypatch):
+    completions = use_fake_client(monkeypatch, [('{"root": "Topic", "nod', "length"), (_topic_json(2), "stop")])
+    result = asyncio.run(ai_generator.generate_topic_nodes("Topic", 2))
+    assert [node["title"] for node in result["nodes"]] == ["Sub 1", "Sub 2"]
+    assert [call["model"] for call in completions.calls] == [ai_generator.FAST_MODEL, ai_generator.FAST_MODEL]
+    first, retry = (call["max_tokens"] for call in completions.calls)
+    assert retry == first * ai_generator.TRUNCATION_RETRY_FACTOR
+
+
+def test_truncated_twice_fails_without_escalating(monkeypatch):
+    completions = use_fake_client(monkeypatch, [('{"root": "Topic", "nod', "length"), ('{"root": "Topic", "nodes": [', "length")])
+    result = asyncio.run(ai_generator.generate_topic_nodes("Topic", 2))
+    assert result["fallback"] is True
+    assert [call["model"] for call in completions.calls] == [ai_generator.FAST_MODEL, ai_generator.FAST_MODEL]
+
+
+def test_invalid_complete_output_escalates_with_same_cap(monkeypatch):
+    completions = use_fake_client(monkeypatch, [('{"root": "Topic"}', "stop"), (_topic_json(2), "stop")])
+    result = asyncio.run(ai_generator.generate_topic_nodes("Topic", 2))
+    assert [node["title"] for node in result["nodes"]] == ["Sub 1", "Sub 2"]
+    assert [call["model"] for call in completions.calls] == [ai_generator.FAST_MODEL, ai_generator.ESCALATION_MODEL]
+    assert completions.calls[0]["max_tokens"] == completions.calls[1]["max_tokens"]
+
+
+def test_truncated_followup_is_not_retried(monkeypatch):
+    completions = use_fake_client(monkeypatch, [("Cut off", "length")])
+    asyncio.run(ai_generator.generate_node_followup("Python", "Dicts", "Why hashing?"))
+    assert len(completions.calls) == 1
+
+
+def test_node_detail_cap_scales_with_sections(monkeypatch):
+    one = json.dumps({"title": "N", "definition": "d"})
+    two = json.dumps({"title": "N", "definition": "d", "why_important": "w"})
+    completions = use_fake_client(monkeypatch, [(one, "stop"), (two, "stop")])
+    asyncio.run(ai_generator.generate_node_detail("Caps", "N", None, ["definition"]))
+    asyncio.run(ai_generator.generate_node_detail("Caps", "N", None, ["definition", "why_important"]))
+    per_section = ai_generator.TASK_PROFILES["node_detail"]["max_tokens_per_item"]
+    assert [call["max_tokens"] for call in completions.calls] == [per_section, 2 * per_section]
@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import ai_generator
+from src.app import app
+from src.admission import llm_admission
+from src.cache import node_cache, node_section_key
+from src.routes import challenge
+from tests.fakes import use_fake_client
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    """
+    Replaces the generator; records the sections each call asked for.
+    """
+    calls = []
+
+    async def fake_generate_node_detail(topic, node_title, followup=None, sections=None):
+        calls.append({"node_title": node_title, "followup": followup, "sections": list(sections)})
+        detail = {"title": node_title}
+        for section in sections:
+            detail[section] = f"{section} of {node_title}"
+            if not followup:
+                node_cache.put(node_section_key(topic, node_title, section), detail[section])
+        return detail
+
+    monkeypatch.setattr(challenge, "authenticate_and_get_user_details", lambda request: {"user_id": "detail-user"})
+    monkeypatch.setattr(challenge, "generate_node_detail", fake_generate_node_detail)
+    return calls
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _post(client, **body):
+    return client.post("/api/generate-node-detail", json={"topic": "Route Tests", **body})
+
+
+def test_unknown_section_is_rejected(client, generated):
+    response = _post(client, node_title="A", sections=["definition", "bogus"])
+    assert response.status_code == 400
+    assert "bogus" in response.json()["detail"]
+    assert generated == []
+
+
+def test_partial_cache_hit_generates_only_missing_sections(client, generated):
+    node_cache.put(node_section_key("Route Tests", "B", "definition"), "cached definition")
+
+    response = _post(client, node_title="B", sections=["definition", "examples"])
+    assert response.status_code == 200
+    assert response.json() == {"title": "B", "definition": "cached definition", "examples": "examples of B"}
+    assert [call["sections"] for call in generated] == [["examples"]]
+
+
+def test_fully_cached_sections_skip_admission_and_llm(client, generated):
+    for section in ("definition", "why_important"):
+        node_cache.put(node_section_key("Route Tests", "C", section), f"cached {section}")
+    admitted = llm_admission.stats()["admitted"]
+
+    response = _post(client, node_title="C", sections=["definition", "why_important"])
+    assert response.status_code == 200
+    assert response.json()["why_important"] == "cached why_important"
+    assert generated == []
+    assert llm_admission.stats()["admitted"] == admitted
+
+
+def test_default_is_all_sections(client, generated):
+    response = _post(client, node_title="D")
+    assert response.status_code == 200
+    assert generated[0]["sections"] == list(challenge.NODE_DETAIL_SECTIONS)
+
+
+def test_followup_requests_bypass_and_never_fill_the_cache(client, generated):
+    node_cache.put(node_section_key("Route Tests", "E", "definition"), "cached definition")
+
+    response = _post(client, node_title="E", sections=["definition"], followup="Explain it like I'm five")
+    assert response.status_code == 200
+    assert response.json()["definition"] == "definition of E"
+    assert generated[0]["followup"] == "Explain it like I'm five"
+    assert node_cache.get(node_section_key("Route Tests", "E", "definition")) == "cached definition"
+
+
+def test_generator_does_not_cache_followup_sections(monkeypatch):
+    reply = json.dumps({"title": "F", "definition": "Tailored definition"})
+    use_fake_client(monkeypatch, [(reply, "stop")])
+    detail = asyncio.run(ai_generator.generate_node_detail("Route Tests", "F", "Explain simply", ["definition"]))
+    assert detail["definition"] == "Tailored definition"
+    assert node_cache.get(node_section_key("Route Tests", "F", "definition")) is None
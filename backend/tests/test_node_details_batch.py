@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+from src import ai_generator
+from tests.fakes import use_fake_client
+
+SECTIONS = ["definition", "examples"]
+
+
+def _entry(title, **overrides):
+    return {"title": title, "definition": f"{title} defined", "examples": [f"{title} example"], **overrides}
+
+
+def _batch_reply(*entries):
+    return (json.dumps({"nodes": list(entries)}), "stop")
+
+
+def _prompt_titles(call):
+    return call["messages"][-1]["content"].split("\n")[1:]
+
+
+def test_bad_entries_are_dropped_without_sinking_the_chunk(monkeypatch):
+    use_fake_client(monkeypatch, [_batch_reply(
+        _entry("A"),
+        _entry("B", definition=""),
+        "not an object",
+        _entry("Unrequested"),
+        _entry("A", definition="second copy"),
+    )])
+    details = asyncio.run(ai_generator._generate_node_detail_chunk("Batch Validation", ["A", "B"], SECTIONS))
+    assert details == {"A": {"title": "A", "definition": "A defined", "examples": ["A example"]}}
+
+
+def test_titles_match_after_normalization(monkeypatch):
+    use_fake_client(monkeypatch, [_batch_reply(_entry("hash-map"), _entry("BINARY  search"))])
+    details = asyncio.run(ai_generator._generate_node_detail_chunk("Batch Titles", ["Hash Map", "Binary Search"], SECTIONS))
+    assert sorted(details) == ["Binary Search", "Hash Map"]
+    assert details["Hash Map"]["title"] == "Hash Map"
+    assert details["Hash Map"]["definition"] == "hash-map defined"
+
+
+def test_only_failed_titles_are_reissued(monkeypatch):
+    completions = use_fake_client(monkeypatch, [
+        _batch_reply(_entry("A"), _entry("B", examples=[])),
+        _batch_reply(_entry("B"), _entry("C")),
+    ])
+    details = asyncio.run(ai_generator.generate_node_details_batch("Batch Reissue", ["A", "B", "C"], SECTIONS))
+    assert sorted(details) == ["A", "B", "C"]
+    assert [_prompt_titles(call) for call in completions.calls] == [["- A", "- B", "- C"], ["- B", "- C"]]
+
+
+def test_single_node_fallback_for_what_still_fails(monkeypatch):
+    completions = use_fake_client(monkeypatch, [
+        _batch_reply(_entry("A")),
+        _batch_reply(_entry("B")),
+        (json.dumps(_entry("C")), "stop"),
+    ])
+    details = asyncio.run(ai_generator.generate_node_details_batch("Batch Singles", ["A", "B", "C"], SECTIONS))
+    assert details["C"] == {"title": "C", "definition": "C defined", "examples": ["C example"]}
+    assert "node: C under topic" in completions.calls[-1]["messages"][-1]["content"]
+    assert len(completions.calls) == 3
+
+
+def test_nodes_that_never_validate_are_left_out(monkeypatch):
+    use_fake_client(monkeypatch, [
+        _batch_reply(_entry("A")),
+        ("not json", "stop"),
+        ("still not json", "stop"),
+    ])
+    details = asyncio.run(ai_generator.generate_node_details_batch("Batch Omitted", ["A", "B"], SECTIONS))
+    assert sorted(details) == ["A"]
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import os
+
+from src import profiling
+from src.profiling import ProfilingMiddleware, _prune
+
+
+def _scope(headers=()):
+    return {"type": "http", "method": "GET", "path": "/api/thing", "headers": list(headers)}
+
+
+def _middleware(monkeypatch, tmp_path, token="", rate=0.0, app=None):
+    monkeypatch.setattr(profiling, "PROFILE_ADMIN_TOKEN", token)
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", rate)
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    return ProfilingMiddleware(app or _app(0))
+
+
+def _app(seconds):
+    async def app(scope, receive, send):
+        await asyncio.sleep(seconds)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+    return app
+
+
+async def _request(middleware, headers=()):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware(_scope(headers), None, send)
+    return dict(sent[0]["headers"])
+
+
+def test_disabled_without_token_or_sample_rate(monkeypatch, tmp_path):
+    middleware = _middleware(monkeypatch, tmp_path)
+    assert not middleware.enabled
+    headers = asyncio.run(_request(middleware, [(b"x-profile", b"anything")]))
+    assert b"x-profile-id" not in headers
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_should_profile_requires_matching_token(monkeypatch, tmp_path):
+    middleware = _middleware(monkeypatch, tmp_path, token="secret")
+    assert middleware._should_profile(_scope([(b"x-profile", b"secret")]))
+    assert not middleware._should_profile(_scope([(b"x-profile", b"wrong")]))
+    assert not middleware._should_profile(_scope())
+
+
+def test_should_profile_by_sample_rate(monkeypatch, tmp_path):
+    assert _middleware(monkeypatch, tmp_path, rate=1.0)._should_profile(_scope())
+    monkeypatch.setattr(profiling.random, "random", lambda: 0.5)
+    assert not _middleware(monkeypatch, tmp_path, rate=0.1)._should_profile(_scope())
+
+
+def test_prune_keeps_newest_pairs(tmp_path):
+    for i in range(5):
+        for suffix in (".json", ".folded"):
+            path = tmp_path / f"capture{i}{suffix}"
+            path.write_text("x")
+            os.utime(path, (1000 + i, 1000 + i))
+
+    _prune(tmp_path, keep=2)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "capture3.folded", "capture3.json", "capture4.folded", "capture4.json",
+    ]
+
+
+def test_capture_records_concurrent_requests(monkeypatch, tmp_path):
+    middleware = _middleware(monkeypatch, tmp_path, token="secret", app=_app(0.05))
+
+    async def scenario():
+        profiled = asyncio.ensure_future(_request(middleware, [(b"x-profile", b"secret")]))
+        await asyncio.sleep(0.01)
+        await asyncio.gather(_request(middleware), _request(middleware))
+        return await profiled
+
+    headers = asyncio.run(scenario())
+    name = headers[b"x-profile-id"].decode()
+    meta = json.loads((tmp_path / f"{name}.json").read_text())
+    assert meta["status"] == 200
+    assert meta["concurrent_requests"] == {"at_start": 1, "peak": 3}
+    assert (tmp_path / f"{name}.folded").exists()
+    assert middleware.in_flight == 0
@@ -0,0 +1,88 @@
+import uuid
+
+import pytest
+
+from src.database.db import save_topic_content, search_user_content
+from src.database.models import SessionLocal
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def _user():
+    return f"search-{uuid.uuid4().hex}"
+
+
+def _detail(db, user_id, topic, node_title, definition):
+    return save_topic_content(db, user_id, "node_detail", topic, {"title": node_title, "definition": definition}, node_title)
+
+
+def test_users_never_see_each_others_rows(db):
+    user_a = _user()
+    # Tokenizes to a phrase that contains user_a's id
+    user_b = f"{user_a}-2"
+    mine = _detail(db, user_a, "Graphs", "Dijkstra", "Shortest paths with a priority queue.")
+    _detail(db, user_b, "Graphs", "Dijkstra", "Shortest paths with a priority queue.")
+    _detail(db, user_b, "Graphs", "Bellman Ford", "Shortest paths with negative edges.")
+
+    results = search_user_content(db, user_a, "shortest paths")["results"]
+    assert [row["id"] for row in results] == [mine.id]
+    assert search_user_content(db, user_a, "negative")["results"] == []
+    assert len(search_user_content(db, user_b, "shortest")["results"]) == 2
+
+
+@pytest.mark.parametrize("query", [
+    '"',
+    '"unterminated phrase',
+    "heap*",
+    "*",
+    "NEAR(heap sort)",
+    "NEAR(",
+    "heap AND",
+    "OR heap",
+    "heap AND OR NOT sort",
+    "title: heap",
+    "^heap -sort (",
+    "user_id : x",
+])
+def test_query_syntax_is_never_interpreted(db, query):
+    user_id = _user()
+    _detail(db, user_id, "Sorting", "Heap Sort", "Build a heap, then pop the max repeatedly.")
+
+    page = search_user_content(db, user_id, query)
+    assert isinstance(page["results"], list)
+    assert page["has_more"] is False
+
+
+def test_operator_words_are_matched_as_plain_terms(db):
+    user_id = _user()
+    row = _detail(db, user_id, "Logic", "Boolean Operators", "AND and OR combine conditions, NOT negates.")
+    assert [r["id"] for r in search_user_content(db, user_id, "AND OR NOT")["results"]] == [row.id]
+
+
+def test_title_matches_rank_above_body_matches(db):
+    user_id = _user()
+    titled = _detail(db, user_id, "Data Structures", "Heap", "A tree with an ordering property.")
+    # Newer row, so it would come first on a tie
+    mentioned = _detail(db, user_id, "Sorting", "Selection", "Slower than using a heap for repeated minimums.")
+
+    results = search_user_content(db, user_id, "heap")["results"]
+    assert [row["id"] for row in results] == [titled.id, mentioned.id]
+    assert results[0]["rank"] > results[1]["rank"]
+
+
+def test_has_more_flips_on_the_last_page(db):
+    user_id = _user()
+    for i in range(5):
+        _detail(db, user_id, "Trees", f"Tree {i}", "Balanced search tree rotations.")
+
+    pages = [search_user_content(db, user_id, "rotations", page, 2) for page in (1, 2, 3)]
+    assert [page["has_more"] for page in pages] == [True, True, False]
+    assert [len(page["results"]) for page in pages] == [2, 2, 1]
+    ids = [row["id"] for page in pages for row in page["results"]]
+    assert len(set(ids)) == 5
+    assert search_user_content(db, user_id, "rotations", 4, 2) == {"page": 4, "page_size": 2, "has_more": False, "results": []}
@@ -0,0 +1,41 @@
+import asyncio
+
+from src import ai_generator
+from src.cache import normalize_text
+
+
+def _fake_requests(monkeypatch, responses):
+    calls = []
+
+    async def fake_request(topic, max_subtopics, ancestors=None, exclude_titles=None, fallback_on_failure=True):
+        calls.append(max_subtopics)
+        titles = responses[len(calls) - 1]
+        return {"root": topic, "nodes": [{"id": str(i), "title": t} for i, t in enumerate(titles, start=1)]}
+
+    monkeypatch.setattr(ai_generator, "_request_topic_nodes", fake_request)
+    return calls
+
+
+def test_normalize_text_keeps_any_script():
+    assert normalize_text("Hash-Map") == normalize_text("hash map") == normalize_text("HashMap")
+    assert normalize_text("数据结构") == "数据结构"
+    assert normalize_text("Хеш-таблица") == "хештаблица"
+    assert normalize_text("Café") != normalize_text("Caf")
+    assert len({normalize_text(t) for t in ("C", "C++", "C#")}) == 3
+
+
+def test_expansion_dedupes_against_tree_and_tops_up(monkeypatch):
+    calls = _fake_requests(monkeypatch, [
+        ["useState", "Use-State", "useEffect", "Hooks"],
+        ["useMemo", "useRef", "useCallback"],
+    ])
+    result = asyncio.run(ai_generator.expand_topic_node("Hooks", 4, ["React"], ["useState"]))
+    assert [node["title"] for node in result["nodes"]] == ["useEffect", "useMemo", "useRef", "useCallback"]
+    assert calls == [4, 3]
+
+
+def test_expansion_keeps_non_latin_titles(monkeypatch):
+    calls = _fake_requests(monkeypatch, [["数组", "链表", "数据结构", "哈希表"]])
+    result = asyncio.run(ai_generator.expand_topic_node("数据结构", 3, ["计算机科学"], ["栈"]))
+    assert [node["title"] for node in result["nodes"]] == ["数组", "链表", "哈希表"]
+    assert calls == [3]
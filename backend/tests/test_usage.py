@@ -0,0 +1,153 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import ai_generator, usage
+from src.app import app
+from src.database.db import get_challenge_quota
+from src.database.models import SessionLocal, LLMUsage
+from src.routes import challenge, metrics
+from tests.fakes import use_fake_client
+
+
+def _row(task, n):
+    return {
+        "user_id": "ledger-user",
+        "endpoint": "test",
+        "task": task,
+        "model": "fake",
+        "prompt_tokens": n,
+        "completion_tokens": n,
+        "latency_ms": 1,
+        "fallback": False,
+        "escalated": False,
+        "created_at": usage.datetime.now(),
+    }
+
+
+def _stored(task):
+    db = SessionLocal()
+    try:
+        return db.query(LLMUsage).filter(LLMUsage.task == task).order_by(LLMUsage.prompt_tokens).all()
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    """
+    Captures ledger rows instead of queueing them.
+    """
+    rows = []
+    monkeypatch.setattr(usage.usage_ledger, "record", rows.append)
+    return rows
+
+
+def test_ledger_flushes_full_batches_then_remainder(monkeypatch):
+    task = f"ledger-{uuid.uuid4().hex}"
+    ledger = usage.UsageLedger(batch_size=3, flush_seconds=30, max_buffer=100)
+    batches = []
+    write = ledger._write
+    monkeypatch.setattr(ledger, "_write", lambda rows: (batches.append(len(rows)), write(rows)))
+
+    for n in range(7):
+        ledger.record(_row(task, n))
+    ledger.close()
+
+    assert batches == [3, 3, 1]
+    assert [row.prompt_tokens for row in _stored(task)] == list(range(7))
+    assert ledger.stats() == {"buffered": 0, "written": 7, "dropped": 0, "failed_batches": 0}
+
+
+def test_ledger_flushes_partial_batch_after_interval():
+    task = f"ledger-{uuid.uuid4().hex}"
+    ledger = usage.UsageLedger(batch_size=100, flush_seconds=0.1, max_buffer=100)
+    try:
+        ledger.record(_row(task, 1))
+        ledger.record(_row(task, 2))
+        deadline = time.monotonic() + 5
+        while ledger.written < 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert len(_stored(task)) == 2
+    finally:
+        ledger.close()
+
+
+def test_ledger_drops_rows_when_buffer_is_full(monkeypatch):
+    ledger = usage.UsageLedger(batch_size=10, flush_seconds=30, max_buffer=2)
+    monkeypatch.setattr(ledger, "_ensure_started", lambda: None)
+    for n in range(5):
+        ledger.record(_row("dropped", n))
+    assert ledger.stats()["buffered"] == 2
+    assert ledger.stats()["dropped"] == 3
+
+
+def test_quota_units_by_mode(monkeypatch):
+    context = usage.UsageContext("quota-user", "test")
+    monkeypatch.setattr(usage, "TOKENS_PER_QUOTA_UNIT", 1000)
+
+    monkeypatch.setattr(usage, "QUOTA_MODE", "requests")
+    context.tokens = 2500
+    assert context.quota_units() == 1
+
+    monkeypatch.setattr(usage, "QUOTA_MODE", "tokens")
+    assert context.quota_units() == 3
+    context.tokens = 0
+    assert context.quota_units() == 1
+
+
+def test_token_mode_charges_tokens_used(monkeypatch, recorded):
+    user_id = f"tokens-{uuid.uuid4().hex}"
+    monkeypatch.setattr(challenge, "authenticate_and_get_user_details", lambda request: {"user_id": user_id})
+    monkeypatch.setattr(challenge, "QUOTA_MODE", "tokens")
+    monkeypatch.setattr(usage, "QUOTA_MODE", "tokens")
+    monkeypatch.setattr(usage, "TOKENS_PER_QUOTA_UNIT", 10)
+    # Each fake call spends 30 tokens: 3 units
+    use_fake_client(monkeypatch, [("Plain answer.", "stop")])
+
+    response = TestClient(app).post(
+        "/api/generate-node-followup",
+        json={"topic": "Quota", "node_title": "Units", "followup": "Why?"},
+    )
+    assert response.status_code == 200
+
+    db = SessionLocal()
+    try:
+        assert get_challenge_quota(db, user_id).quota_remaining == 20 - 3
+    finally:
+        db.close()
+    assert [(row["user_id"], row["prompt_tokens"] + row["completion_tokens"]) for row in recorded] == [(user_id, 30)]
+
+
+def test_escalated_success_is_not_a_fallback(monkeypatch, recorded):
+    topic_json = '{"root": "Topic", "nodes": [{"id": "n1", "title": "Sub", "children": []}]}'
+    use_fake_client(monkeypatch, [("not json", "stop"), (topic_json, "stop")])
+
+    result = asyncio.run(ai_generator.generate_topic_nodes("Topic", 1))
+
+    assert [node["title"] for node in result["nodes"]] == ["Sub"]
+    assert [(row["escalated"], row["fallback"]) for row in recorded] == [(False, False), (True, False)]
+
+
+def test_placeholder_is_recorded_as_fallback(monkeypatch, recorded):
+    use_fake_client(monkeypatch, [("not json", "stop"), ("still not json", "stop")])
+
+    asyncio.run(ai_generator.generate_topic_nodes("Topic", 1))
+
+    assert [(row["escalated"], row["fallback"]) for row in recorded] == [(False, False), (True, True)]
+
+
+def test_admin_usage_requires_token(monkeypatch):
+    client = TestClient(app)
+    monkeypatch.setattr(metrics, "ADMIN_TOKEN", "")
+    assert client.get("/api/admin/usage").status_code == 404
+
+    monkeypatch.setattr(metrics, "ADMIN_TOKEN", "secret")
+    assert client.get("/api/admin/usage", headers={"X-Admin-Token": "wrong"}).status_code == 404
+
+    response = client.get("/api/admin/usage", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert set(response.json()) == {"quota_mode", "since", "users", "endpoints"}
@@ -2,6 +2,9 @@ import { X } from "lucide-react"
 import React, { useEffect, useRef, useState } from "react"
 import { useApi } from "../utils/api.js"
 
+// Sections the backend can generate for a node, in display order
+const DETAIL_SECTIONS = ["definition", "why_important", "examples", "interview_questions"]
+
 export function NodeDetailModal({ topic, node, detail: initialDetail, isLoading, onClose }) {
   const { makeRequest } = useApi()
   const [detail, setDetail] = useState(initialDetail)
@@ -9,6 +12,11 @@ export function NodeDetailModal({ topic, node, detail: initialDetail, isLoading,
   const [error, setError] = useState(null)
   const [messages, setMessages] = useState([])
   const chatEndRef = useRef(null)
+  const followupAbortRef = useRef(null)
+  const sectionsAbortRef = useRef(null)
+  const [sectionsLoading, setSectionsLoading] = useState(false)
+
+  const missingSections = detail ? DETAIL_SECTIONS.filter((section) => detail[section] === undefined) : []
   
   // Sync loading state with prop
   const loading = isLoading
@@ -45,24 +53,49 @@ export function NodeDetailModal({ topic, node, detail: initialDetail, isLoading,
     ])
     setQuestion("")
     console.log("#############Question inside NodeDetailModal###################:", trimmed)
+    const controller = new AbortController()
+    followupAbortRef.current = controller
     try {
       const resp = await makeRequest("generate-node-followup", {
         method: "POST",
-        body: JSON.stringify({ topic, node_title: node.title, followup: trimmed })
+        body: JSON.stringify({ topic, node_title: node.title, followup: trimmed }),
+        signal: controller.signal
       })
       console.log("#############QuestionResponse inside NodeDetailModal###################:", resp)
       const answerText = resp?.answer ? String(resp.answer) : formatResponse(resp)
       setMessages((prev) => [
         ...prev,
-        { id: Date.now() + 1, role: "assistant", text: answerText }
+        { id: Date.now() + 1, role: "assistant", text: answerText, truncated: Boolean(resp?.truncated) }
       ])
     } catch (err) {
+      if (err.name === "AbortError") return
       setError(err.message || "Failed to ask question")
     } finally {
       setFollowupLoading(false)
     }
   }
   
+  const loadMoreSections = async () => {
+    if (missingSections.length === 0) return
+    setSectionsLoading(true)
+    setError(null)
+    const controller = new AbortController()
+    sectionsAbortRef.current = controller
+    try {
+      const more = await makeRequest("generate-node-detail", {
+        method: "POST",
+        body: JSON.stringify({ topic, node_title: node.title, sections: missingSections }),
+        signal: controller.signal
+      })
+      setDetail((prev) => ({ ...prev, ...more }))
+    } catch (err) {
+      if (err.name === "AbortError") return
+      setError(err.message || "Failed to load more details")
+    } finally {
+      setSectionsLoading(false)
+    }
+  }
+
   // Update detail when initialDetail prop changes
   useEffect(() => {
     setDetail(initialDetail)
@@ -70,6 +103,14 @@ export function NodeDetailModal({ topic, node, detail: initialDetail, isLoading,
     setMessages([])
   }, [initialDetail])
 
+  // Closing the modal cancels any follow-up still being generated
+  useEffect(() => {
+    return () => {
+      followupAbortRef.current?.abort()
+      sectionsAbortRef.current?.abort()
+    }
+  }, [])
+
   // Auto-scroll chat to bottom on new messages
   useEffect(() => {
     if (chatEndRef.current) {
@@ -153,6 +194,17 @@ export function NodeDetailModal({ topic, node, detail: initialDetail, isLoading,
                 </div>
               )}
 
+              {/* Remaining sections are only generated when asked for */}
+              {missingSections.length > 0 && (
+                <button
+                  onClick={loadMoreSections}
+                  disabled={sectionsLoading}
+                  className="w-full rounded-2xl border border-white/10 bg-white/5 px-6 py-4 text-lg font-semibold text-purple-200 transition-all hover:bg-white/10 disabled:opacity-60"
+                >
+                  {sectionsLoading ? "Loading more details..." : "Show why it matters, examples and interview questions"}
+                </button>
+              )}
+
               {/* Chat history for follow-ups */}
               <div className="glassmorphism rounded-2xl p-4 border border-white/10 bg-white/5">
                 <h3 className="mb-3 text-lg font-semibold text-white">Follow-up chat</h3>
@@ -170,6 +222,9 @@ export function NodeDetailModal({ topic, node, detail: initialDetail, isLoading,
                         }`}
                       >
                         {msg.text}
+                        {msg.truncated && (
+                          <p className="mt-2 text-xs text-white/50">Answer was cut short. Ask a narrower follow-up for the rest.</p>
+                        )}
                       </div>
                     </div>
                   ))}
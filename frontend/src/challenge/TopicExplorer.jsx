@@ -38,9 +38,19 @@ export function TopicExplorer() {
 
   const [rfNodes, setRfNodes, onNodesChange] = useNodesState([])
   const [rfEdges, setRfEdges, onEdgesChange] = useEdgesState([])
+  const rfNodesRef = useRef([]) // Latest nodes, read by expand handlers created in earlier renders
   const hasLoadedFromUrl = useRef(false)
   const hasFetchedQuota = useRef(false)
   const expandedNodesRef = useRef(new Set()) // Track which nodes have been expanded
+  const detailAbortRef = useRef(null) // In-flight node detail request, aborted when no longer needed
+  const prefetchedTopicRef = useRef(null) // Topic whose sibling definitions were already prefetched
+
+  const abortNodeDetail = useCallback(() => {
+    if (detailAbortRef.current) {
+      detailAbortRef.current.abort()
+      detailAbortRef.current = null
+    }
+  }, [])
 
   // Listen for edge delete events
   useEffect(() => {
@@ -92,6 +102,24 @@ export function TopicExplorer() {
     return () => window.removeEventListener("deleteEdge", handleDeleteEdge)
   }, [])
 
+  useEffect(() => {
+    rfNodesRef.current = rfNodes
+  }, [rfNodes])
+
+  // Tree-aware expansion: send the node's ancestor path and every title already
+  // in the graph so the backend only returns subtopics we don't have yet
+  const fetchSubtopics = useCallback((title, path) => {
+    return makeRequest("generate-challenge", {
+      method: "POST",
+      body: JSON.stringify({
+        topic: title,
+        max_subtopics: 6,
+        ancestors: path.slice(0, -1),
+        existing_titles: rfNodesRef.current.map((n) => n.data.title)
+      })
+    })
+  }, [makeRequest])
+
   // Fetch quota on mount - only once
   useEffect(() => {
     if (hasFetchedQuota.current) return
@@ -134,20 +162,46 @@ export function TopicExplorer() {
     setNodeDetail(null)
     setDetailLoading(true)
 
+    // Cancel the previous node's request so the backend can stop generating it
+    abortNodeDetail()
+    const controller = new AbortController()
+    detailAbortRef.current = controller
+
+    const topicToUse = nodesData?.topic || topic || nodeTitle
+
+    // Users usually open several siblings in a row: prefetch the other root
+    // subtopics' definitions in one packed request so those clicks hit the cache
+    const siblings = (nodesData?.nodes || []).map((n) => n.title)
+    if (siblings.includes(nodeTitle) && prefetchedTopicRef.current !== topicToUse) {
+      prefetchedTopicRef.current = topicToUse
+      const others = siblings.filter((title) => title !== nodeTitle)
+      if (others.length > 0) {
+        makeRequest("generate-node-details-batch", {
+          method: "POST",
+          body: JSON.stringify({ topic: topicToUse, node_titles: others, sections: ["definition"] })
+        }).catch((err) => console.error("Prefetch error:", err))
+      }
+    }
+
     try {
-      const topicToUse = nodesData?.topic || topic || nodeTitle
       const detail = await makeRequest("generate-node-detail", {
         method: "POST",
-        body: JSON.stringify({ topic: topicToUse, node_title: nodeTitle })
+        // Definition first; the modal fetches the remaining sections on demand
+        body: JSON.stringify({ topic: topicToUse, node_title: nodeTitle, sections: ["definition"] }),
+        signal: controller.signal
       })
       console.log("#############Node detail###################:", detail)
       setNodeDetail(detail)
     } catch (err) {
+      if (err.name === "AbortError") return
       setError(err.message || "Failed to fetch node details")
     } finally {
-      setDetailLoading(false)
+      if (detailAbortRef.current === controller) {
+        detailAbortRef.current = null
+        setDetailLoading(false)
+      }
     }
-  }, [nodesData, topic, makeRequest])
+  }, [nodesData, topic, makeRequest, abortNodeDetail])
 
   const appendNodesAndEdges = useCallback((parentId, newNodes) => {
     if (!newNodes || newNodes.length === 0) return
@@ -168,6 +222,7 @@ export function TopicExplorer() {
       const timestamp = Date.now()
       const parentX = parentNode.position.x
       const parentY = parentNode.position.y
+      const parentPath = parentNode.data.path || [parentNode.data.title]
       
       const mapped = newNodes.map((n, idx) => {
         const nodeId = `${n.id}-${timestamp}-${idx}`
@@ -177,15 +232,13 @@ export function TopicExplorer() {
           position: { x: parentX + 400, y: parentY - 100 + idx * 120 },
           data: {
             title: n.title,
+            path: [...parentPath, n.title],
             childrenCount: 0, // No children initially
             onCenter: () => handleNodeClick(n),
             onExpand: async () => {
               try {
                 setIsLoading(true)
-                const res = await makeRequest("generate-challenge", {
-                  method: "POST",
-                  body: JSON.stringify({ topic: n.title, max_subtopics: 6 })
-                })
+                const res = await fetchSubtopics(n.title, [...parentPath, n.title])
                 appendNodesAndEdges(nodeId, res.nodes || [])
               } catch (err) {
                 setError(err.message || "Failed to expand node")
@@ -219,7 +272,7 @@ export function TopicExplorer() {
       
       return [...nds.filter(n => n.id !== parentId), updatedParent, ...mapped]
     })
-  }, [makeRequest, handleNodeClick])
+  }, [fetchSubtopics, handleNodeClick])
 
   const generateTopicNodes = useCallback(async (e, topicOverride = null) => {
     e && e.preventDefault()
@@ -229,6 +282,8 @@ export function TopicExplorer() {
     setIsLoading(true)
     setError(null)
     setNodesData(null)
+    abortNodeDetail()
+    setSelectedNode(null)
 
     try {
       const data = await makeRequest("generate-challenge", {
@@ -245,16 +300,14 @@ export function TopicExplorer() {
         position: { x: 100, y: 300 },
         data: {
           title: data.topic,
+          path: [data.topic],
           childrenCount: data.nodes ? data.nodes.length : 0,
           onCenter: () => handleNodeClick({ id: rootId, title: data.topic }),
           onExpand: async () => {
             // expand root (fetch same as clicking arrow)
             try {
               setIsLoading(true)
-              const res = await makeRequest("generate-challenge", {
-                method: "POST",
-                body: JSON.stringify({ topic: data.topic, max_subtopics: 6 })
-              })
+              const res = await fetchSubtopics(data.topic, [data.topic])
               // append nodes
               appendNodesAndEdges(rootId, res.nodes || [])
             } catch (err) {
@@ -275,15 +328,13 @@ export function TopicExplorer() {
           position: { x: 500, y: 50 + idx * 120 },
           data: {
             title: n.title,
+            path: [data.topic, n.title],
             childrenCount: 0, // No children initially
             onCenter: () => handleNodeClick(n),
             onExpand: async () => {
               try {
                 setIsLoading(true)
-                const res = await makeRequest("generate-challenge", {
-                  method: "POST",
-                  body: JSON.stringify({ topic: n.title, max_subtopics: 6 })
-                })
+                const res = await fetchSubtopics(n.title, [data.topic, n.title])
                 appendNodesAndEdges(nodeId, res.nodes || [])
               } catch (err) {
                 setError(err.message || "Failed to expand node")
@@ -314,7 +365,7 @@ export function TopicExplorer() {
     } finally {
       setIsLoading(false)
     }
-  }, [topic, maxSubtopics, makeRequest, handleNodeClick, appendNodesAndEdges])
+  }, [topic, maxSubtopics, makeRequest, fetchSubtopics, handleNodeClick, appendNodesAndEdges, abortNodeDetail])
 
 
   const getNextResetTime = () => {
@@ -540,6 +591,8 @@ export function TopicExplorer() {
           detail={nodeDetail}
           isLoading={detailLoading}
           onClose={() => {
+            abortNodeDetail()
+            setDetailLoading(false)
             setSelectedNode(null)
             setNodeDetail(null)
           }}
@@ -26,6 +26,10 @@ export const useApi = () => {
             if (response.status === 429) {
                 throw new Error("Daily quota exceeded")
             }
+            if (response.status === 503) {
+                const retryAfter = response.headers.get("Retry-After")
+                throw new Error(`Server is busy, please retry${retryAfter ? ` in ${retryAfter}s` : ""}`)
+            }
             // throw new Error(errorData?.detail || "An error occurred")
             throw new Error(errorData?.detail || response.statusText)
         }